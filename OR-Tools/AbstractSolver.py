@@ -33,6 +33,20 @@ class AbstractSolver(ABC):
         """
         pass
 
+    @abstractmethod
+    def is_time_limit_reached(self) -> bool:
+        """
+        Returns True if the last execution was cut short by the time limit
+        """
+        pass
+
+    @abstractmethod
+    def get_time_limit(self) -> int:
+        """
+        Returns the time limit (in seconds) applied to the last execution (0 if no time limit)
+        """
+        pass
+
     @abstractmethod
     def _parse_metadata(self, metadata):
         """
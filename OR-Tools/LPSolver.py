@@ -97,6 +97,13 @@ class LPSolver(AbstractSolver):
         except:
             self._execution_time = 0.0
 
+        # Execution stopped without an optimal solution after running for the whole time limit
+        self._time_limit_reached = (
+            status != pywraplp.Solver.OPTIMAL
+            and self._time_limit > 0
+            and self._execution_time >= self._time_limit
+        )
+
         if status == pywraplp.Solver.OPTIMAL:
             self._solution = {
                 "objective": self._solver.Objective().Value(),
@@ -110,6 +117,18 @@ class LPSolver(AbstractSolver):
 
         return self._execution_time, self._solution
 
+    def is_time_limit_reached(self) -> bool:
+        """
+        Returns True if the last execution was cut short by the time limit
+        """
+        return self._time_limit_reached
+
+    def get_time_limit(self) -> int:
+        """
+        Returns the time limit (in seconds) applied to the last execution (0 if no time limit)
+        """
+        return self._time_limit
+
     def _setup(self, metadata: str, input_data):
         """
         Sets up the solver, by defining the GLOP solver, setting
@@ -125,6 +144,8 @@ class LPSolver(AbstractSolver):
         the objective's type (maximize/minimize) and the constraints to be taken under consideration
         for the given problem description
         """
+        self._time_limit_reached = False
+
         # Define the solver
         solver = pywraplp.Solver.CreateSolver("GLOP")
         if not solver:
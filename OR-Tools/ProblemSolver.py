@@ -1,19 +1,79 @@
 import os
-import sys
+import time
 import signal
 import json
 import threading
 import logging
 import logging.config
+import multiprocessing
+from collections import deque
 from logging.handlers import TimedRotatingFileHandler
 
 from dotenv import load_dotenv
-from confluent_kafka import Consumer, Producer, KafkaError
+from confluent_kafka import Consumer, Producer, KafkaError, TopicPartition
 
 from LPSolver import LPSolver
 from VRPSolver import VRPSolver
 
 LOG_DIRECTORY = "./logs"
+WORK_TOPIC = "problem-execute-work"
+
+SOLVERS = {LPSolver.get_id(): LPSolver, VRPSolver.get_id(): VRPSolver}
+
+
+def solve(model_id: str, metadata: any, input_data: str, max_execution_time: int):
+    """
+    Execute the solver specified by model with the given parameters (runs on a child process).
+
+    Returns a tuple with the execution time in seconds, the result object (dict),
+    whether the execution was cut short by the time limit & the time limit applied (in seconds)
+
+    Keyword arguments:
+    - model_id -- the ID of the model to be executed
+    - metadata -- the metadata needed by the model (in JSON format)
+    - input_data -- input data with execution variables of the solver (in JSON format)
+    - max_execution_time -- maximum time limit in seconds for the solver's execution (0 for no limit)
+    """
+    solver = SOLVERS[model_id](metadata, input_data)
+    execution_time, result = solver.solve(max_execution_time)
+    return (
+        execution_time,
+        result,
+        solver.is_time_limit_reached(),
+        solver.get_time_limit(),
+    )
+
+
+def execute(
+    connection,
+    model_id: str,
+    metadata: any,
+    input_data: str,
+    max_execution_time: int,
+):
+    """
+    Entry point of the child process executing a problem: Start a new process group (so that
+    the execution can be stopped along with any processes it starts), solve the problem
+    & send the outcome to the parent process.
+
+    Sends a tuple with True & the result of solve(), or False & the error message
+
+    Keyword arguments:
+    - connection -- the connection to the parent process
+    - model_id -- the ID of the model to be executed
+    - metadata -- the metadata needed by the model (in JSON format)
+    - input_data -- input data with execution variables of the solver (in JSON format)
+    - max_execution_time -- maximum time limit in seconds for the solver's execution (0 for no limit)
+    """
+    os.setsid()
+    try:
+        connection.send(
+            (True, solve(model_id, metadata, input_data, max_execution_time))
+        )
+    except Exception as e:
+        connection.send((False, str(e)))
+    finally:
+        connection.close()
 
 
 class ProblemSolver:
@@ -25,6 +85,36 @@ class ProblemSolver:
         self._broker_uri = os.getenv("BROKER_URI")
         self._max_execution_time = int(os.getenv("EXECUTION_TIME_LIMIT"))
 
+        # Number of problems executed concurrently (each one on its own child process) - Each slot is
+        # a separate solver for the orchestrator, with ID "{SOLVER_ID}-{slot}" (or SOLVER_ID if there is only one)
+        self._slots = int(os.getenv("SOLVER_SLOTS", "1"))
+
+        # How problems reach the solver:
+        # - push: the orchestrator assigns each problem to a free slot on the slot's topic
+        # - pull: the problems are consumed from the shared work topic (along with all other solvers) while a slot is free
+        self._dispatch_mode = os.getenv("DISPATCH_MODE", "push").lower()
+
+        # Models served by the solver (default all) & resources announced to the orchestrator:
+        # number of cores & memory in MB (default those of the host)
+        self._models = [
+            model_id.strip()
+            for model_id in (os.getenv("SOLVER_MODELS") or ",".join(SOLVERS)).split(",")
+            if model_id.strip() in SOLVERS
+        ]
+        self._cores = int(os.getenv("SOLVER_CORES") or os.cpu_count() or 1)
+        self._memory = int(
+            os.getenv("SOLVER_MEMORY")
+            or os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+        )
+
+        # How often (in seconds) to announce the slots, supported models & capacity to the orchestrator
+        self._heartbeat_interval = float(os.getenv("HEARTBEAT_INTERVAL", "5"))
+
+        # Producer's batching configuration & maximum time (in seconds) to wait for pending deliveries on shutdown
+        self._producer_linger_ms = int(os.getenv("PRODUCER_LINGER_MS", "5"))
+        self._producer_batch_size = int(os.getenv("PRODUCER_BATCH_SIZE", "1000"))
+        self._producer_flush_timeout = float(os.getenv("PRODUCER_FLUSH_TIMEOUT", "5"))
+
         # Initialize logger
         if not os.path.exists(LOG_DIRECTORY):
             os.makedirs(LOG_DIRECTORY)
@@ -42,116 +132,224 @@ class ProblemSolver:
             if isinstance(handler, TimedRotatingFileHandler):
                 handler.suffix = "%Y-%m-%d"
                 handler.extMatch = handler.extMatch
-        self._logger.info(f"OR-Tools Solver instance {self._solver_id} started")
+        self._logger.info(
+            f"OR-Tools Solver instance {self._solver_id} started (models: {', '.join(self._models)})"
+        )
+        if self._dispatch_mode == "pull" and len(self._models) < len(SOLVERS):
+            self._logger.warning(
+                "Problems of all models are consumed from the work topic - Problems of models not served will fail"
+            )
 
         self._consumers = []
-        self._solver_thread = None
-        self._problem_id = None
-        self._stop_event = threading.Event()
+        self._work_consumer = None
 
-        # Service started - Send a message to notify that it's free
-        self._send_message(
-            "problem-execute-res",
-            {"problemId": None, "solverId": self._solver_id},
+        # Recently deleted problems - Skipped if consumed from the work topic
+        self._deleted_problems = deque(maxlen=1000)
+
+        # Problem being executed on each slot (None if free)
+        if self._slots > 1:
+            slot_ids = [f"{self._solver_id}-{slot + 1}" for slot in range(self._slots)]
+        else:
+            slot_ids = [self._solver_id]
+        self._problem_ids = {slot_id: None for slot_id in slot_ids}
+        # Child process executing the problem of each slot
+        self._processes = {}
+        # Guards the state of the slots above, which is changed by both the consumer loop & the supervisor threads
+        self._slots_lock = threading.Lock()
+
+        # Child processes are forked from a server process with the solvers preloaded,
+        # which keeps them clear of the producer's threads
+        self._context = multiprocessing.get_context("forkserver")
+        self._context.set_forkserver_preload(["LPSolver", "VRPSolver"])
+
+        # Initialize the Kafka producer - A single producer is shared by all messages,
+        # and delivery callbacks are served from the consumer loop
+        self._producer = Producer(
+            {
+                "bootstrap.servers": self._broker_uri,
+                "linger.ms": self._producer_linger_ms,
+                "batch.num.messages": self._producer_batch_size,
+            }
         )
 
+        # Service started - Send a message to notify that all slots are free
+        for slot_id in self._problem_ids:
+            self._send_message(
+                "problem-execute-res",
+                {"problemId": None, "solverId": slot_id},
+            )
+
     def _solve_problem(
-        self, problem_id: str, model_id: str, metadata: any, input_data: str
+        self,
+        slot_id,
+        problem_id: str,
+        model_id: str,
+        metadata: any,
+        input_data: str,
+        time_limit: int = None,
     ):
         """
-        Execute the solver specified by model with the given parameters.
+        Start the execution of the solver specified by model with the given parameters
+        on a child process.
+
+        The result is reported when the child process finishes (see _supervise_execution)
 
         Keyword arguments:
+        - slot_id -- the ID of the slot the problem is executed on
         - problem_id -- the unique identifier of the problem to be executed (used for reporting)
         - model_id -- the ID of the model to be executed
         - metadata -- the metadata needed by the model (in JSON format)
         - input_data -- input data with execution variables of the solver (in JSON format)
+        - time_limit -- maximum time limit in seconds set by the orchestrator, applied on top of the
+        solver's execution time limit (default None)
         """
 
-        self._logger.info(f"Received problem (id={problem_id}, model={model_id})")
-        self._problem_id = problem_id
-
-        try:
-            # Linear Programming Solver
-            if model_id == LPSolver.get_id():
-                solver = LPSolver(metadata, input_data)
-            # Vehicle Routing Solver
-            elif model_id == VRPSolver.get_id():
-                solver = VRPSolver(metadata, input_data)
-            # Invalid Model - Notify and return
-            else:
-                self._problem_id = None
-                self._solver_thread = None
-                self._logger.warning(f"Invalid model with ID {model_id})")
-                self._send_message(
-                    "problem-execute-res",
-                    {
-                        "problemId": problem_id,
-                        "solverId": self._solver_id,
-                        "error": f"Unknown model ID {model_id}",
-                    },
-                )
-                return
+        self._logger.info(
+            f"Received problem (id={problem_id}, model={model_id}, slot={slot_id})"
+        )
 
-            # Send ACK message - Execution started
-            self._logger.info(
-                f"Execution started for problem {problem_id} (model={model_id})"
+        # Invalid Model - Notify and return
+        if model_id not in SOLVERS:
+            self._logger.warning(f"Invalid model with ID {model_id})")
+            self._send_message(
+                "problem-execute-res",
+                {
+                    "problemId": problem_id,
+                    "solverId": slot_id,
+                    "error": f"Unknown model ID {model_id}",
+                },
             )
+            return
+
+        # Model not served by this solver - Notify and return
+        if model_id not in self._models:
+            self._logger.warning(f"Model with ID {model_id} is not served")
             self._send_message(
                 "problem-execute-res",
                 {
                     "problemId": problem_id,
-                    "solverId": self._solver_id,
+                    "solverId": slot_id,
+                    "error": f"Model ID {model_id} is not served by solver {slot_id}",
                 },
             )
+            return
+
+        # The orchestrator's time limit may only shorten the solver's limit
+        max_execution_time = self._max_execution_time
+        if time_limit is not None and time_limit > 0:
+            if max_execution_time > 0:
+                max_execution_time = min(max_execution_time, time_limit)
+            else:
+                max_execution_time = time_limit
+
+        # Not daemonic, so that the execution can start processes of its own
+        receiver, sender = self._context.Pipe(duplex=False)
+        process = self._context.Process(
+            target=execute,
+            args=(sender, model_id, metadata, input_data, max_execution_time),
+        )
+        process.start()
+        sender.close()
+        with self._slots_lock:
+            self._processes[slot_id] = process
+            self._problem_ids[slot_id] = problem_id
+
+        # Send ACK message - Execution started
+        self._logger.info(
+            f"Execution started for problem {problem_id} (model={model_id}, slot={slot_id})"
+        )
+        self._send_message(
+            "problem-execute-res",
+            {
+                "problemId": problem_id,
+                "solverId": slot_id,
+            },
+        )
 
-            # Solve the problem
-            execution_time, result = solver.solve(self._max_execution_time)
+        supervisor = threading.Thread(
+            target=self._supervise_execution,
+            args=(slot_id, problem_id, process, receiver),
+        )
+        supervisor.daemon = True
+        supervisor.start()
+
+    def _supervise_execution(self, slot_id, problem_id: str, process, receiver):
+        """
+        Wait for the child process executing a problem to finish, free its slot
+        & report the result (or the error).
+
+        Executions that were stopped (see _stop_execution) are not reported
+
+        Keyword arguments:
+        - slot_id -- the ID of the slot the problem was executed on
+        - problem_id -- the unique identifier of the executed problem
+        - process -- the child process executing the problem
+        - receiver -- the connection receiving the outcome from the child process
+        """
+        try:
+            success, outcome = receiver.recv()
+        except EOFError:
+            success, outcome = False, None
+        finally:
+            receiver.close()
+        process.join()
+
+        # The slot may have been freed (execution stopped) & taken by another problem in the meantime
+        with self._slots_lock:
+            if (
+                self._processes.get(slot_id) is not process
+                or self._problem_ids[slot_id] != problem_id
+            ):
+                return
+            del self._processes[slot_id]
+            self._problem_ids[slot_id] = None
 
-        except Exception as e:
+        if not success:
+            error = (
+                outcome
+                or f"Execution terminated abruptly (exit code {process.exitcode})"
+            )
             self._logger.error(
-                f"_solve_problem: Exception occured for {problem_id}: {str(e)}"
+                f"_supervise_execution: Exception occured for {problem_id}: {error}"
             )
-            self._problem_id = None
-            self._solver_thread = None
             self._send_message(
                 "problem-execute-res",
                 {
                     "problemId": problem_id,
-                    "solverId": self._solver_id,
-                    "error": str(e),
+                    "solverId": slot_id,
+                    "error": error,
                 },
             )
             return
 
         # Notify about the available result
+        execution_time, result, time_limit_reached, applied_time_limit = outcome
         self._logger.info(f"Execution finished for {problem_id}")
-        self._problem_id = None
-        self._solver_thread = None
         self._send_message(
             "problem-result",
             {
                 "problemId": problem_id,
                 "executionTime": execution_time,
                 "result": json.dumps(result),
-                "solverId": self._solver_id,
+                "timeLimitReached": time_limit_reached,
+                "timeLimit": applied_time_limit,
+                "solverId": slot_id,
             },
         )
 
     def _send_message(self, topic: str, message: any):
         """
-        Produce a message to Kafka broker
+        Produce a message to Kafka broker.
+
+        Delivery is asynchronous - The delivery callback is served on a later poll of the producer
 
         Keyword arguments:
         - topic -- the topic name where the message should be sent
         - message -- any object (dict, array etc.) that will be sent to the broker (will be turned to JSON before sending)
         """
-        # Initialize Kafka broker configuration
-        broker_config = {"bootstrap.servers": self._broker_uri}
-        producer = Producer(broker_config)
         data = json.dumps(message)
 
-        producer.produce(
+        self._producer.produce(
             topic,
             data,
             callback=lambda err, msg: (
@@ -162,8 +360,7 @@ class ProblemSolver:
                 else self._logger.debug(f"Message Delivered (Topic: {topic})")
             ),
         )
-        producer.poll(0)
-        producer.flush()
+        self._producer.poll(0)
 
     def run(self):
         """
@@ -172,9 +369,16 @@ class ProblemSolver:
 
         If a problem is already being executed, ignore the request.
         """
-        # Initialize Kafka broker configuration
+        # Initialize Kafka broker configuration - Each slot receives requests on its own topic, and the
+        # topic of the solver is used for status requests towards all slots
         self._requests_topic = f"problem-execute-req-{self._solver_id}"
-        topics = [self._requests_topic, "problem-deleted"]
+        self._slot_topics = {
+            f"problem-execute-req-{slot_id}": slot_id for slot_id in self._problem_ids
+        }
+        topics = [
+            list(dict.fromkeys([self._requests_topic, *self._slot_topics])),
+            ["problem-deleted"],
+        ]
         broker_config = {
             "bootstrap.servers": self._broker_uri,
             "group.id": f"{self._app_id}-{self._solver_id}",
@@ -184,11 +388,37 @@ class ProblemSolver:
 
         self._consumers = [Consumer(broker_config) for _ in topics]
         for index in range(len(topics)):
-            self._consumers[index].subscribe([topics[index]])
+            self._consumers[index].subscribe(topics[index])
+
+        # Pull mode - All solvers consume the work topic as a single group
+        if self._dispatch_mode == "pull":
+            self._work_consumer = Consumer(
+                {**broker_config, "group.id": f"{self._app_id}-workers"}
+            )
+            self._work_consumer.subscribe([WORK_TOPIC])
+            self._consumers.append(self._work_consumer)
 
+        last_heartbeat = None
         while True:
+            # Serve delivery callbacks of produced messages
+            self._producer.poll(0)
+
+            # Periodically announce that the solver is alive - Sent from the consumer loop,
+            # so that heartbeats stop when the loop is stuck
+            if (
+                last_heartbeat is None
+                or time.monotonic() - last_heartbeat >= self._heartbeat_interval
+            ):
+                last_heartbeat = time.monotonic()
+                self._send_heartbeat()
+
             for consumer in self._consumers:
                 try:
+                    # Fetch work only while there is a free slot - The consumer keeps polling
+                    # while paused, in order to remain in the group
+                    if consumer is self._work_consumer:
+                        self._update_work_consumer()
+
                     msg = consumer.poll(0.2)  # Poll for messages
                     if msg is None:
                         continue
@@ -222,8 +452,19 @@ class ProblemSolver:
                         continue
 
                     # Handle the received message depending on the topic value
-                    if topic == self._requests_topic:
-                        self._handle_incoming_request(problem_data)
+                    if topic in self._slot_topics:
+                        self._handle_incoming_request(
+                            problem_data, self._slot_topics[topic]
+                        )
+                    elif topic == self._requests_topic:
+                        self._handle_status_request(problem_data)
+                    elif topic == WORK_TOPIC:
+                        if not self._handle_work(problem_data):
+                            # No free slot - Consume the message again when a slot is free
+                            consumer.seek(
+                                TopicPartition(topic, msg.partition(), msg.offset())
+                            )
+                            continue
                     elif topic == "problem-deleted":
                         consumer.commit(msg)
                         self._handle_problem_deletion(problem_data)
@@ -234,35 +475,124 @@ class ProblemSolver:
                     self._logger.error(f"run: Exception occured on consumer: {str(e)}")
                     continue
 
-    def _handle_incoming_request(self, problem):
+    def _send_heartbeat(self):
+        """
+        Send a heartbeat to the orchestrator, with the problem executed on each slot,
+        the served models, the number of slots & the resources of the solver
+        """
+        with self._slots_lock:
+            slots = [
+                {"solverId": slot_id, "problemId": problem_id}
+                for slot_id, problem_id in self._problem_ids.items()
+            ]
+        self._send_message(
+            "solver-heartbeat",
+            {
+                "solverId": self._solver_id,
+                "slots": slots,
+                "models": self._models,
+                "capacity": self._slots,
+                "resources": {"cores": self._cores, "memory": self._memory},
+            },
+        )
+
+    def _get_free_slot(self):
+        """
+        Returns the ID of the first free slot, or None if all slots are busy
+        """
+        for slot_id, problem_id in self._problem_ids.items():
+            if problem_id is None:
+                return slot_id
+        return None
+
+    def _update_work_consumer(self):
+        """
+        Pause fetching from the work topic while all slots are busy, and resume when a slot is free
+        """
+        assignment = self._work_consumer.assignment()
+        if not assignment:
+            return
+        if self._get_free_slot() is None:
+            self._work_consumer.pause(assignment)
+        else:
+            self._work_consumer.resume(assignment)
+
+    def _handle_work(self, problem):
+        """
+        Handle a problem consumed from the work topic, by executing it on a free slot
+        (deleted problems are skipped).
+
+        Returns False if there is no free slot, otherwise True
+
+        Keyword arguments:
+        - problem -- the problem submission as a dict, including the problem's ID,
+        solver's ID, model, metadata & input data
+        """
+        if problem.get("problemId") in self._deleted_problems:
+            self._logger.info(f"Skipped deleted problem {problem.get('problemId')}")
+            return True
+
+        slot_id = self._get_free_slot()
+        if slot_id is None:
+            return False
+
+        self._handle_incoming_request(problem, slot_id)
+        return True
+
+    def _handle_status_request(self, problem):
+        """
+        Handle an incoming message received on the solver's topic while running multiple slots.
+
+        Status requests (no problem) are answered by every slot, while problems are
+        handled by the first free slot (or the first slot, if all are busy)
+
+        Keyword arguments:
+        - problem -- the problem submission as a dict, including the problem's ID,
+        solver's ID, model, metadata & input data
+        """
+        if problem.get("problemId") is None:
+            for slot_id in self._problem_ids:
+                self._handle_incoming_request(problem, slot_id)
+            return
+
+        slot_id = self._get_free_slot()
+        if slot_id is None:
+            slot_id = next(iter(self._problem_ids))
+        self._handle_incoming_request(problem, slot_id)
+
+    def _handle_incoming_request(self, problem, slot_id):
         """
         Handle an incoming problem execution request received from the broker.
 
-        If there is already an execution in progress, notify with the ID of the problem
+        If there is already an execution in progress on the slot, notify with the ID of the problem
         being executed.
 
-        Otherwise, start the solver thread.
+        Otherwise, start the execution on a worker process.
 
         Keyword arguments:
         - problem -- the problem submission as a dict, including the problem's ID,
         solver's ID, model, metadata & input data
+        - slot_id -- the ID of the slot the request was sent to
         """
         problem_id = problem.get("problemId")
         model_id = problem.get("modelId")
         metadata = problem.get("metadata")
         input_data = problem.get("inputData")
+        time_limit = problem.get("timeLimit")
         self._logger.debug(
             f"Received request for problem {problem_id}, model {model_id}"
         )
 
         # Already executing a problem - Notify that solver is busy
-        if self._problem_id is not None:
-            self._logger.warning(f"Received request while busy ({self._problem_id})")
+        if self._problem_ids[slot_id] is not None:
+            self._logger.warning(
+                f"Received request while busy ({self._problem_ids[slot_id]}, slot={slot_id})"
+            )
             self._send_message(
                 "problem-execute-res",
                 {
-                    "problemId": self._problem_id,
-                    "solverId": self._solver_id,
+                    "problemId": self._problem_ids[slot_id],
+                    "solverId": slot_id,
                 },
             )
             return
@@ -273,7 +603,7 @@ class ProblemSolver:
                 "problem-execute-res",
                 {
                     "problemId": problem_id,
-                    "solverId": self._solver_id,
+                    "solverId": slot_id,
                     "error": "Invalid data - Missing required input 'problemId'",
                 },
             )
@@ -285,7 +615,7 @@ class ProblemSolver:
                 "problem-execute-res",
                 {
                     "problemId": problem_id,
-                    "solverId": self._solver_id,
+                    "solverId": slot_id,
                     "error": "Invalid data - Missing required input 'modelId'",
                 },
             )
@@ -297,7 +627,7 @@ class ProblemSolver:
                 "problem-execute-res",
                 {
                     "problemId": problem_id,
-                    "solverId": self._solver_id,
+                    "solverId": slot_id,
                     "error": "Invalid data - Missing required input 'metadata'",
                 },
             )
@@ -309,25 +639,23 @@ class ProblemSolver:
                 "problem-execute-res",
                 {
                     "problemId": problem_id,
-                    "solverId": self._solver_id,
+                    "solverId": slot_id,
                     "error": "Invalid data - Missing required input 'inputData'",
                 },
             )
             return
 
-        # Start the solver on a separate thread
-        self._solver_thread = threading.Thread(
-            target=self._solve_problem,
-            args=(problem_id, model_id, metadata, input_data),
+        # Start the solver on a worker process
+        self._solve_problem(
+            slot_id, problem_id, model_id, metadata, input_data, time_limit
         )
-        self._solver_thread.daemon = True
-        self._solver_thread.start()
 
     def _handle_problem_deletion(self, problem):
         """
         Handle an incoming message received from the broker that a problem needs to be deleted.
 
-        If the problem is currently being executed on the solver, restart to stop the running thread.
+        If the problem is currently being executed on the solver, stop its execution
+        and notify that the slot is free.
 
         Keyword arguments:
         - problem -- the problem submission as a dict, including the problem's ID
@@ -339,22 +667,64 @@ class ProblemSolver:
             return
 
         self._logger.debug(f"Received request to delete problem {problem_id}")
-
-        if self._problem_id == problem_id:
-            self._logger.warning(
-                f"Restarting the solver in order to stop execution of {problem_id}"
+        self._deleted_problems.append(problem_id)
+
+        with self._slots_lock:
+            slot_ids = [
+                slot_id
+                for slot_id, running_problem_id in self._problem_ids.items()
+                if running_problem_id == problem_id
+            ]
+        stopped = False
+        for slot_id in slot_ids:
+            # Skipped if the execution finished in the meantime (already reported)
+            if not self._stop_execution(slot_id, problem_id):
+                continue
+            stopped = True
+            self._logger.warning(f"Stopped execution of {problem_id} (slot={slot_id})")
+            self._send_message(
+                "problem-execute-res",
+                {"problemId": None, "solverId": slot_id},
             )
-            sys.exit(-1)
-        else:
+        if not stopped:
             self._logger.debug(
                 f"Ignore request for deleting unknown problem {problem_id}"
             )
 
+    def _stop_execution(self, slot_id, problem_id=None):
+        """
+        Stop the execution on a slot by killing the process group of its child process
+        (the child process along with any processes it started) & free the slot.
+
+        Returns True if the slot was freed, otherwise False (the slot is not executing the given problem)
+
+        Keyword arguments:
+        - slot_id -- the ID of the slot
+        - problem_id -- if given, the execution is only stopped if the slot is still executing this problem (default None)
+        """
+        with self._slots_lock:
+            if problem_id is not None and self._problem_ids[slot_id] != problem_id:
+                return False
+            process = self._processes.pop(slot_id, None)
+            self._problem_ids[slot_id] = None
+        if process is None:
+            return True
+
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            # The child process has not started its own process group yet
+            process.kill()
+        return True
+
     def __del__(self):
         """
-        Destructor: Close the consumer and stop the execution (if active)
+        Destructor: Close the consumer, deliver pending messages and stop the executions (if active)
         """
         self._logger.critical("Shutting down...")
+        for slot_id in list(self._processes):
+            self._stop_execution(slot_id)
+        self._producer.flush(self._producer_flush_timeout)
         for consumer in self._consumers:
             consumer.close()
 
@@ -0,0 +1,243 @@
+import numpy as np
+
+# Average number of locations per cell of the grid (relative to the number of nearest neighbours searched)
+LOCATIONS_PER_CELL = 2
+# Number of refinements of the cell size, so that the occupied cells hold the intended number of locations
+CELL_SIZE_REFINEMENTS = 3
+# Maximum number of iterations of k-means clustering (stops earlier if no location changes cluster)
+CLUSTERING_ITERATIONS = 100
+
+
+class SpatialIndex:
+    """
+    Grid index of locations (latitude, longitude) on the Earth's surface, used for finding the nearest
+    neighbours of every location without calculating the distances between all pairs of locations.
+
+    The locations are mapped to points of the unit sphere, where the straight-line (chord) distance
+    between two points increases with their great-circle distance, and grouped in cubic cells
+    - The neighbours of a location are searched in the cells around it, expanding the search until
+    no location outside of the searched cells can be nearer
+    """
+
+    def __init__(self, locations):
+        """
+        Keyword arguments:
+        - locations -- list of (latitude, longitude) tuples, in degrees
+        """
+        locations = np.radians(np.array(locations, dtype=np.float64).reshape(-1, 2))
+        latitudes, longitudes = locations[:, 0], locations[:, 1]
+        self._points = np.column_stack(
+            (
+                np.cos(latitudes) * np.cos(longitudes),
+                np.cos(latitudes) * np.sin(longitudes),
+                np.sin(latitudes),
+            )
+        )
+
+    def get_nearest(self, k):
+        """
+        Find the k nearest neighbours of every location (excluding itself).
+
+        Returns an array with the indexes of the neighbours of each location (one row per location),
+        with min(k, number of locations - 1) columns
+
+        Keyword arguments:
+        - k -- the number of neighbours
+        """
+        num_points = len(self._points)
+        k = min(k, num_points - 1)
+        if k <= 0:
+            return np.zeros((num_points, 0), dtype=np.int64)
+
+        self._build_grid(LOCATIONS_PER_CELL * k)
+
+        neighbours = np.zeros((num_points, k), dtype=np.int64)
+        for cell, (start, end) in self._cells.items():
+            members = self._order[start:end]
+            nearest, complete = self._search(members, cell, 1, k)
+            neighbours[members[complete]] = nearest[complete]
+
+            # Locations whose neighbours may lie beyond the searched cells (sparse areas)
+            for member in members[~complete]:
+                nearest, complete_member = self._search(member[np.newaxis], cell, 2, k)
+                if not complete_member[0]:
+                    nearest = self._search_all(member, k)
+                neighbours[member] = nearest
+        return neighbours
+
+    def get_path(self, members, origin):
+        """
+        Order locations as a path, starting from the location nearest to the origin
+        and moving each time to the nearest location not visited yet (nearest neighbour heuristic).
+
+        Returns an array with the indexes of the locations in the order of the path
+
+        Keyword arguments:
+        - members -- the indexes of the locations
+        - origin -- the index of the location where the path starts from (not included in the path)
+        """
+        members = np.asarray(members, dtype=np.int64)
+        visited = np.zeros(len(members), dtype=bool)
+        path = np.zeros(len(members), dtype=np.int64)
+        current = origin
+        for position in range(len(members)):
+            distances = self._get_distances(current, members)
+            distances[visited] = np.inf
+            nearest = np.argmin(distances)
+            visited[nearest] = True
+            path[position] = current = members[nearest]
+        return path
+
+    def get_clusters(self, members, count, seed=0):
+        """
+        Partition locations into geographic clusters (spherical k-means, with k-means++ initial centers).
+
+        Returns a list with the indexes of the locations of each cluster (empty clusters are omitted)
+
+        Keyword arguments:
+        - members -- the indexes of the locations
+        - count -- the number of clusters
+        - seed -- seed of the random choice of initial centers, so that the clusters are reproducible (default 0)
+        """
+        members = np.asarray(members, dtype=np.int64)
+        points = self._points[members]
+        count = min(count, len(members))
+        if count <= 0:
+            return []
+
+        # k-means++: Each center is chosen with probability proportional to the squared distance from the nearest chosen center
+        generator = np.random.default_rng(seed)
+        centers = np.zeros((count, 3))
+        centers[0] = points[generator.integers(len(points))]
+        nearest = np.maximum(2 - 2 * points @ centers[0], 0)
+        for center in range(1, count):
+            total = nearest.sum()
+            if total <= 0:
+                centers[center:] = centers[0]
+                break
+            centers[center] = points[generator.choice(len(points), p=nearest / total)]
+            nearest = np.minimum(
+                nearest, np.maximum(2 - 2 * points @ centers[center], 0)
+            )
+
+        # Assign each location to the nearest center (largest dot product on the unit sphere)
+        # & move each center to the (normalized) mean of its locations
+        assignment = None
+        for _ in range(CLUSTERING_ITERATIONS):
+            new_assignment = np.argmax(points @ centers.T, axis=1)
+            if assignment is not None and np.array_equal(assignment, new_assignment):
+                break
+            assignment = new_assignment
+            sums = np.column_stack(
+                [
+                    np.bincount(assignment, weights=points[:, axis], minlength=count)
+                    for axis in range(3)
+                ]
+            )
+            norms = np.linalg.norm(sums, axis=1)
+            centers[norms > 0] = sums[norms > 0] / norms[norms > 0, np.newaxis]
+
+        return [
+            members[assignment == center]
+            for center in range(count)
+            if (assignment == center).any()
+        ]
+
+    def _build_grid(self, locations_per_cell):
+        """
+        Group the points in cells, sized so that each occupied cell holds about the given number of points
+
+        Keyword arguments:
+        - locations_per_cell -- the intended number of points per occupied cell
+        """
+        # The points lie on a surface, so the number of points per cell grows with the square of the cell size
+        extent = np.ptp(self._points, axis=0).max()
+        self._cell_size = max(
+            extent * np.sqrt(locations_per_cell / len(self._points)), 1e-9
+        )
+        for _ in range(CELL_SIZE_REFINEMENTS):
+            occupied = len(np.unique(self._get_cells(self._points), axis=0))
+            self._cell_size *= np.sqrt(
+                locations_per_cell / (len(self._points) / occupied)
+            )
+
+        # Sort the points by cell, so that the points of each cell are a contiguous range of the order
+        cells = self._get_cells(self._points)
+        self._order = np.lexsort(cells.T[::-1])
+        unique_cells, starts, counts = np.unique(
+            cells[self._order], axis=0, return_index=True, return_counts=True
+        )
+        self._cells = {
+            tuple(cell): (start, start + count)
+            for cell, start, count in zip(unique_cells.tolist(), starts, counts)
+        }
+
+    def _get_cells(self, points):
+        """
+        Get the cell (integer coordinates) of each point
+
+        Keyword arguments:
+        - points -- array of points (one row per point)
+        """
+        return np.floor(points / self._cell_size).astype(np.int64)
+
+    def _search(self, members, cell, radius, k):
+        """
+        Find the k nearest neighbours of points of a cell among the points of the cells within the given radius.
+
+        Returns an array with the neighbours of each point & whether they are certainly the nearest ones
+        (no point outside of the searched cells can be nearer)
+
+        Keyword arguments:
+        - members -- the indexes of the points
+        - cell -- the cell of the points
+        - radius -- the number of cells searched around the cell, in every direction
+        - k -- the number of neighbours
+        """
+        offsets = range(-radius, radius + 1)
+        ranges = [
+            self._cells.get((cell[0] + x, cell[1] + y, cell[2] + z))
+            for x in offsets
+            for y in offsets
+            for z in offsets
+        ]
+        candidates = np.concatenate(
+            [self._order[start:end] for start, end in filter(None, ranges)]
+        )
+
+        distances = self._get_distances(members, candidates)
+        distances[members[:, np.newaxis] == candidates] = np.inf
+        if len(candidates) <= k:
+            return np.zeros((len(members), k), dtype=np.int64), np.zeros(
+                len(members), dtype=bool
+            )
+
+        nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        farthest = np.take_along_axis(distances, nearest[:, -1:], axis=1)[:, 0]
+        # Every point outside of the searched cells is farther than the radius (in cell sizes)
+        complete = farthest <= (radius * self._cell_size) ** 2
+        return candidates[nearest], complete
+
+    def _search_all(self, member, k):
+        """
+        Find the k nearest neighbours of a point among all points
+
+        Keyword arguments:
+        - member -- the index of the point
+        - k -- the number of neighbours
+        """
+        distances = self._get_distances(member, slice(None))
+        distances[member] = np.inf
+        return np.argpartition(distances, k - 1)[:k]
+
+    def _get_distances(self, origins, destinations):
+        """
+        Get the squared chord distances between points - For points of the unit sphere
+        |a - b|^2 = 2 - 2 * a.b, so they are calculated with a single matrix product
+
+        Keyword arguments:
+        - origins -- the indexes of the origin points (index or array)
+        - destinations -- the indexes of the destination points (array or slice)
+        """
+        distances = 2 - 2 * (self._points[origins] @ self._points[destinations].T)
+        return np.maximum(distances, 0, out=distances)
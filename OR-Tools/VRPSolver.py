@@ -1,14 +1,118 @@
+import os
 from os import path
 import sys
 import json
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from typing import Tuple
 
-from math import radians, sin, cos, sqrt, atan2
+from math import radians, sin, cos, sqrt, atan2, ceil
 
+import numpy as np
 from ortools.constraint_solver import routing_enums_pb2
 from ortools.constraint_solver import pywrapcp
 
 from AbstractSolver import AbstractSolver, InvalidInputError
+from SpatialIndex import SpatialIndex
+
+# Number of entries of the distance matrix calculated at once (in blocks of rows) - Small enough for
+# the intermediate arrays to stay in the CPU cache
+DISTANCE_MATRIX_BLOCK_SIZE = 2**17
+# Distances (in meters) within this tolerance of a rounding tie are recalculated one by one, so that
+# the rounding is identical to _haversine_distance regardless of the precision of vectorized functions
+ROUNDING_TIE_TOLERANCE = 1e-6
+# Locations closer than this to being antipodal (1 - haversine of the central angle) are also recalculated
+ANTIPODAL_TOLERANCE = 1e-4
+# Distance (in meters) of the arcs that are not candidates in large-instance mode (see 'nearestNeighbors')
+# - Far longer than any arc it could replace, so that the search never keeps such an arc in a solution
+NON_CANDIDATE_ARC_DISTANCE = 10**9
+# Search strategies of portfolio mode (first solution strategy & local search metaheuristic) - The metaheuristics
+# other than the automatic one never stop by themselves, so they only run when there is a time limit
+PORTFOLIO_STRATEGIES = [
+    ("PATH_CHEAPEST_ARC", "AUTOMATIC"),
+    ("SAVINGS", "AUTOMATIC"),
+    ("CHRISTOFIDES", "AUTOMATIC"),
+    ("PARALLEL_CHEAPEST_INSERTION", "AUTOMATIC"),
+    ("PATH_CHEAPEST_ARC", "GUIDED_LOCAL_SEARCH"),
+    ("PATH_CHEAPEST_ARC", "SIMULATED_ANNEALING"),
+]
+
+
+def get_available_cores() -> int:
+    """
+    Get the number of cores available to the current process - The cores it may run on,
+    limited by the CPU quota of its container (cgroup v2), if any
+    """
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as file:
+            quota, period = file.read().split()
+        if quota != "max":
+            cores = min(cores, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cores
+
+
+def get_workers(tasks: int) -> int:
+    """
+    Get the number of worker processes for running tasks in parallel (decomposition & portfolio mode).
+
+    Unless set by SOLVER_WORKERS, the cores of the solver (SOLVER_CORES, or the cores available to the process,
+    within the CPU limit of its container) are shared equally by its slots (SOLVER_SLOTS)
+
+    Keyword arguments:
+    - tasks -- the number of tasks to be run
+    """
+    workers = int(os.getenv("SOLVER_WORKERS") or "0")
+    if workers <= 0:
+        cores = int(os.getenv("SOLVER_CORES") or "0") or get_available_cores()
+        workers = cores // max(1, int(os.getenv("SOLVER_SLOTS") or "1"))
+    return max(1, min(tasks, workers))
+
+
+def solve_cluster(metadata: str, input_data: str):
+    """
+    Solve the Vehicle Routing Problem of a cluster (runs on a worker process in decomposition mode).
+
+    Returns a tuple with the routes of the vehicles (lists of indexes of the cluster's locations, from & to the depot,
+    or None if no solution was found) & whether the execution was cut short by the time limit
+
+    Keyword arguments:
+    - metadata -- solver's metadata in JSON format, which contains 'Description' & 'Time Limit' (in seconds)
+    - input_data -- input of the cluster in JSON format
+    """
+    solver = VRPSolver(metadata, input_data)
+    _, result = solver.solve()
+    if "routes" not in result:
+        return None, solver.is_time_limit_reached()
+    return [
+        route["locations"] for route in result["routes"]
+    ], solver.is_time_limit_reached()
+
+
+def solve_strategy(
+    metadata: str, input_data: str, first_solution_strategy: str, metaheuristic: str
+):
+    """
+    Solve the Vehicle Routing Problem with the given search strategy (runs on a worker process in portfolio mode).
+
+    Returns a tuple with the result object (dict) & whether the execution was cut short by the time limit
+
+    Keyword arguments:
+    - metadata -- solver's metadata in JSON format, which contains 'Description' & 'Time Limit' (in seconds)
+    - input_data -- input in JSON format
+    - first_solution_strategy -- name of the first solution strategy, e.g. 'SAVINGS'
+    - metaheuristic -- name of the local search metaheuristic, e.g. 'GUIDED_LOCAL_SEARCH'
+    """
+    solver = VRPSolver(metadata, input_data)
+    solver.set_search_strategy(first_solution_strategy, metaheuristic)
+    _, result = solver.solve()
+    return result, solver.is_time_limit_reached()
 
 
 class VRPSolver(AbstractSolver):
@@ -26,7 +130,9 @@ class VRPSolver(AbstractSolver):
         Keyword arguments:
         - metadata -- solver's metadata in JSON format, which contains 'Description' & 'Time Limit' (in seconds)
         - input_data -- input in JSON format, which contains the problem's number of vehicles,
-        depot, maximum distance and locations
+        depot, maximum distance, locations & optionally the number of nearest neighbours (large-instance mode),
+        the number of clusters & whether to improve their routes globally (decomposition mode)
+        and whether to run multiple search strategies (portfolio mode)
         """
         self._setup(metadata, input_data)
 
@@ -54,7 +160,7 @@ class VRPSolver(AbstractSolver):
         Keyword arguments:
         - max_time_limit -- maximum time limit in seconds for the solver's execution before aborting (default = 0)
         """
-        if not self._routing:
+        if not self._routing and self._clusters == 0 and not self._portfolio:
             raise InvalidInputError("Something went wrong, please try again later")
 
         # Adjust according to maximum time limit
@@ -64,22 +170,74 @@ class VRPSolver(AbstractSolver):
             else:
                 self._time_limit = min(max_time_limit, self._time_limit)
 
+        # Portfolio mode: The best solution of all search strategies
+        if self._portfolio:
+            started = time.time()
+            self._solve_portfolio()
+            self._execution_time = time.time() - started
+            return self._execution_time, self._solution
+
+        # Decomposition mode: Solve the clusters first - Without the global improvement pass,
+        # the solution consists of the routes of the clusters
+        clusters_time = 0.0
+        search_time_limit = self._time_limit
+        if self._clusters > 0:
+            started = time.time()
+            routes = self._solve_clusters()
+            clusters_time = time.time() - started
+
+            if not self._global_improvement:
+                self._execution_time = clusters_time
+                self._set_solution_from_routes(routes)
+                return self._execution_time, self._solution
+
+            # Global improvement pass within the remaining time, starting from the routes of the clusters
+            if self._time_limit > 0:
+                search_time_limit = max(1, self._time_limit - ceil(clusters_time))
+            if routes is not None:
+                self._initial_routes = [route[1:-1] for route in routes]
+            self._create_routing_model()
+
         # Setting first solution heuristic.
         search_parameters = pywrapcp.DefaultRoutingSearchParameters()
-        search_parameters.first_solution_strategy = (
-            routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
+        search_parameters.first_solution_strategy = getattr(
+            routing_enums_pb2.FirstSolutionStrategy, self._first_solution_strategy
+        )
+        search_parameters.local_search_metaheuristic = getattr(
+            routing_enums_pb2.LocalSearchMetaheuristic, self._metaheuristic
         )
-        if self._time_limit > 0:
-            search_parameters.time_limit.seconds = self._time_limit
+        if search_time_limit > 0:
+            search_parameters.time_limit.seconds = search_time_limit
 
         # Solve the problem.
-        solution = self._routing.SolveWithParameters(search_parameters)
+        if self._initial_routes is None:
+            solution = self._routing.SolveWithParameters(search_parameters)
+        else:
+            # Start from the initial routes (large-instance mode or routes of the clusters) - The scheduling filters
+            # of the global span cost are disabled, since they reject solutions of many vehicles on large instances
+            search_parameters.disable_scheduling_beware_this_may_degrade_performance = (
+                True
+            )
+            self._routing.CloseModelWithParameters(search_parameters)
+            initial_solution = self._routing.ReadAssignmentFromRoutes(
+                self._initial_routes, True
+            )
+            solution = self._routing.SolveFromAssignmentWithParameters(
+                initial_solution, search_parameters
+            )
 
         # Return the execution time & results
         try:
             self._execution_time = self._routing.solver().WallTime() / 1000.0
         except:
             self._execution_time = 0.0
+        self._execution_time += clusters_time
+
+        # Search was stopped by the time limit before reaching a local optimum
+        self._time_limit_reached = self._time_limit_reached or self._routing.status() in (
+            routing_enums_pb2.RoutingSearchStatus.ROUTING_PARTIAL_SUCCESS_LOCAL_OPTIMUM_NOT_REACHED,
+            routing_enums_pb2.RoutingSearchStatus.ROUTING_FAIL_TIMEOUT,
+        )
 
         if solution:
             self._solution = {
@@ -119,6 +277,29 @@ class VRPSolver(AbstractSolver):
 
         return self._execution_time, self._solution
 
+    def is_time_limit_reached(self) -> bool:
+        """
+        Returns True if the last execution was cut short by the time limit
+        """
+        return self._time_limit_reached
+
+    def get_time_limit(self) -> int:
+        """
+        Returns the time limit (in seconds) applied to the last execution (0 if no time limit)
+        """
+        return self._time_limit
+
+    def set_search_strategy(self, first_solution_strategy: str, metaheuristic: str):
+        """
+        Set the search strategy of the routing model (default PATH_CHEAPEST_ARC with the automatic metaheuristic)
+
+        Keyword arguments:
+        - first_solution_strategy -- name of the first solution strategy, e.g. 'SAVINGS'
+        - metaheuristic -- name of the local search metaheuristic, e.g. 'GUIDED_LOCAL_SEARCH'
+        """
+        self._first_solution_strategy = first_solution_strategy
+        self._metaheuristic = metaheuristic
+
     def _setup(self, metadata: str, input_data):
         """
         Sets up the solver, by defining the routing model solver, setting
@@ -131,8 +312,15 @@ class VRPSolver(AbstractSolver):
         Keyword arguments:
         - metadata -- solver's metadata in JSON format, which contains 'Description' & 'Time Limit' (in seconds)
         - input_data -- input in JSON format, which contains the problem's number of vehicles,
-        depot, maximum distance and locations
+        depot, maximum distance, locations & optionally the number of nearest neighbours (large-instance mode),
+        the number of clusters & whether to improve their routes globally (decomposition mode)
+        and whether to run multiple search strategies (portfolio mode)
         """
+        self._time_limit_reached = False
+        self._trigonometry = None
+        self._initial_routes = None
+        self.set_search_strategy("PATH_CHEAPEST_ARC", "AUTOMATIC")
+
         # Try to load the data from the JSON input
         try:
             input = json.loads(input_data)
@@ -163,29 +351,40 @@ class VRPSolver(AbstractSolver):
             )
         self._get_max_distance(input["maxDistance"])
 
-        # Calculate distance matrix based on read locations
-        self._calculate_distance_matrix()
+        # Optional - Large-instance mode (number of candidate arcs per location)
+        self._get_nearest_neighbors(input.get("nearestNeighbors"))
+
+        # Optional - Decomposition mode (number of clusters & whether to improve the routes of the clusters globally)
+        self._get_clusters(input.get("clusters"))
+        self._get_global_improvement(input.get("globalImprovement"))
 
+        # Optional - Portfolio mode (search strategies run in parallel)
+        self._get_portfolio(input.get("portfolio"))
+
+        # In decomposition mode, the routing model of all locations is only needed for the global improvement pass,
+        # while in portfolio mode each strategy creates its own
+        self._routing = None
+        if self._clusters == 0 and not self._portfolio:
+            self._create_routing_model()
+
+    def _create_routing_model(self):
+        """
+        Create the routing model of all locations.
+
+        The defined solver is saved in class-wide _routing variable.
+        """
         # Create the routing index manager.
         self._manager = pywrapcp.RoutingIndexManager(
-            len(self._distance_matrix), self._vehicles, self._depot
+            len(self._locations), self._vehicles, self._depot
         )
 
         # Create Routing Model.
         routing = pywrapcp.RoutingModel(self._manager)
 
-        # Create and register a transit callback.
-        def distance_callback(from_index, to_index):
-            """Returns the distance between the two nodes."""
-            # Convert from routing variable Index to distance matrix NodeIndex.
-            from_node = self._manager.IndexToNode(from_index)
-            to_node = self._manager.IndexToNode(to_index)
-            return self._distance_matrix[from_node][to_node]
-
-        transit_callback_index = routing.RegisterTransitCallback(distance_callback)
-
-        # Define cost of each arc.
-        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+        if self._nearest_neighbors > 0:
+            transit_callback_index = self._register_candidate_arcs(routing)
+        else:
+            transit_callback_index = self._register_distance_matrix(routing)
 
         # Add Distance constraint. (if given value is set to 0, set to infinite)
         max_distance = self._max_distance
@@ -205,6 +404,319 @@ class VRPSolver(AbstractSolver):
 
         self._routing = routing
 
+    def _register_distance_matrix(self, routing):
+        """
+        Calculate the distance matrix & register it for the arc costs of the routing model.
+
+        Returns the index of the transit callback to be used for the distance dimension
+
+        Keyword arguments:
+        - routing -- the routing model
+        """
+        # Calculate distance matrix based on read locations
+        self._calculate_distance_matrix()
+
+        # Register the distance matrix as transit for the arc costs - They are evaluated natively by
+        # OR-Tools (indexed by node), without calling back into Python during the search
+        distance_matrix = self._distance_matrix.tolist()
+        transit_matrix_index = routing.RegisterTransitMatrix(distance_matrix)
+
+        # Define cost of each arc.
+        routing.SetArcCostEvaluatorOfAllVehicles(transit_matrix_index)
+
+        # Create and register a transit callback for the distance dimension - A dimension over a
+        # transit matrix is filtered much more expensively when it has a global span cost (the first
+        # solution of large problems is found ~10x slower), so the dimension keeps its callback
+        def distance_callback(from_index, to_index):
+            """Returns the distance between the two nodes."""
+            # Convert from routing variable Index to distance matrix NodeIndex.
+            from_node = self._manager.IndexToNode(from_index)
+            to_node = self._manager.IndexToNode(to_index)
+            return distance_matrix[from_node][to_node]
+
+        return routing.RegisterTransitCallback(distance_callback)
+
+    def _register_candidate_arcs(self, routing):
+        """
+        Large-instance mode: Calculate the distances of the candidate arcs only (from each location to its
+        nearest neighbours & to/from the depot) & register them for the arc costs of the routing model,
+        without calculating the distance matrix. All other arcs get a distance that the search never keeps.
+
+        The initial routes are also calculated (unless given, e.g. by the clusters), since the first solution
+        heuristics can't complete routes over the candidate arcs alone (see solve)
+
+        Returns the index of the transit callback to be used for the distance dimension
+
+        Keyword arguments:
+        - routing -- the routing model
+        """
+        num_locations = len(self._locations)
+        spatial_index = SpatialIndex(self._locations)
+        neighbors = spatial_index.get_nearest(self._nearest_neighbors)
+        if self._initial_routes is None:
+            self._calculate_initial_routes(spatial_index)
+
+        # Candidate arcs: to the nearest neighbours & between consecutive locations of the initial routes,
+        # in both directions (without duplicates)
+        origins = [np.repeat(np.arange(num_locations), neighbors.shape[1])]
+        destinations = [neighbors.ravel()]
+        for route in self._initial_routes:
+            origins.append(np.array(route[:-1], dtype=np.int64))
+            destinations.append(np.array(route[1:], dtype=np.int64))
+        origins, destinations = np.concatenate(origins), np.concatenate(destinations)
+        arcs = np.unique(
+            np.concatenate(
+                (
+                    origins * num_locations + destinations,
+                    destinations * num_locations + origins,
+                )
+            )
+        )
+        origins, destinations = arcs // num_locations, arcs % num_locations
+        distances = self._calculate_distances(origins, destinations)
+
+        # Distances of the candidate arcs of each location (arcs are sorted by origin)
+        bounds = np.searchsorted(origins, np.arange(num_locations + 1)).tolist()
+        destinations, distances = destinations.tolist(), distances.tolist()
+        candidate_distances = [
+            dict(zip(destinations[start:end], distances[start:end]))
+            for start, end in zip(bounds, bounds[1:])
+        ]
+        depot = self._depot
+        depot_distances = self._calculate_distances(
+            depot, np.arange(num_locations)
+        ).tolist()
+
+        # Create and register a transit callback.
+        def candidate_distance_callback(from_index, to_index):
+            """Returns the distance between the two nodes (if the arc is a candidate)."""
+            # Convert from routing variable Index to NodeIndex.
+            from_node = self._manager.IndexToNode(from_index)
+            to_node = self._manager.IndexToNode(to_index)
+            if from_node == depot:
+                return depot_distances[to_node]
+            if to_node == depot:
+                return depot_distances[from_node]
+            return candidate_distances[from_node].get(
+                to_node, NON_CANDIDATE_ARC_DISTANCE
+            )
+
+        transit_callback_index = routing.RegisterTransitCallback(
+            candidate_distance_callback
+        )
+
+        # Define cost of each arc.
+        routing.SetArcCostEvaluatorOfAllVehicles(transit_callback_index)
+
+        return transit_callback_index
+
+    def _calculate_initial_routes(self, spatial_index):
+        """
+        Calculate the initial routes of large-instance mode: The locations are sorted by their bearing
+        from the depot & split into one sector per vehicle, and the route of each sector
+        visits its locations in nearest neighbour order.
+
+        The routes are saved in class-wide _initial_routes variable
+
+        Keyword arguments:
+        - spatial_index -- the spatial index of the locations
+        """
+        locations = np.radians(np.array(self._locations, dtype=np.float64))
+        latitudes, longitudes = locations[:, 0], locations[:, 1]
+        depot_latitude = latitudes[self._depot]
+        dlon = longitudes - longitudes[self._depot]
+        bearings = np.arctan2(
+            np.sin(dlon) * np.cos(latitudes),
+            np.cos(depot_latitude) * np.sin(latitudes)
+            - np.sin(depot_latitude) * np.cos(latitudes) * np.cos(dlon),
+        )
+
+        order = np.argsort(bearings, kind="stable")
+        order = order[order != self._depot]
+        self._initial_routes = [
+            spatial_index.get_path(sector, self._depot).tolist()
+            for sector in np.array_split(order, self._vehicles)
+        ]
+
+    def _solve_clusters(self):
+        """
+        Decomposition mode: Partition the locations into geographic clusters, assign vehicles to each cluster
+        in proportion to its number of locations & solve the problem of each cluster (depot & its locations)
+        on a separate worker process.
+
+        Returns the routes of all vehicles (lists of location indexes, from & to the depot),
+        or None if no solution was found for a cluster
+        """
+        others = [
+            index for index in range(len(self._locations)) if index != self._depot
+        ]
+        clusters = SpatialIndex(self._locations).get_clusters(
+            others, min(self._clusters, self._vehicles)
+        )
+        if not clusters:
+            return [[self._depot, self._depot] for _ in range(self._vehicles)]
+
+        # One vehicle per cluster, then each vehicle to the cluster with the most locations per vehicle
+        sizes = np.array([len(cluster) for cluster in clusters], dtype=np.float64)
+        vehicles = np.ones(len(clusters), dtype=np.int64)
+        for _ in range(self._vehicles - len(clusters)):
+            vehicles[np.argmax(sizes / vehicles)] += 1
+
+        # The clusters are solved in rounds of as many clusters as the workers, each round within
+        # an equal share of the time limit (half of it, if the global improvement pass follows) - At least
+        # 1 second, since a time limit of 0 means no limit
+        workers = get_workers(len(clusters))
+        time_limit = self._time_limit
+        if time_limit > 0:
+            if self._global_improvement:
+                time_limit //= 2
+            time_limit = max(1, time_limit // ceil(len(clusters) / workers))
+        metadata = json.dumps(
+            {"Description": self._description, "Time Limit": time_limit}
+        )
+        inputs = [
+            self._create_input([self._depot] + cluster.tolist(), cluster_vehicles, 0)
+            for cluster, cluster_vehicles in zip(clusters, vehicles.tolist())
+        ]
+
+        # Child processes are forked from a server process, clear of any threads of the solver
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("forkserver")
+        ) as executor:
+            results = list(
+                executor.map(solve_cluster, [metadata] * len(inputs), inputs)
+            )
+
+        # Map the locations of the clusters' routes back to the indexes of all locations
+        routes = []
+        for cluster, (cluster_routes, time_limit_reached) in zip(clusters, results):
+            self._time_limit_reached = self._time_limit_reached or time_limit_reached
+            if cluster_routes is None:
+                return None
+            indexes = [self._depot] + cluster.tolist()
+            routes.extend(
+                [indexes[location] for location in route] for route in cluster_routes
+            )
+        return routes
+
+    def _solve_portfolio(self):
+        """
+        Portfolio mode: Solve the problem with each search strategy on a separate worker process
+        & keep the best solution, along with the strategy that found it.
+
+        The solution is saved in class-wide _solution variable.
+        """
+        strategies = [
+            (first_solution_strategy, metaheuristic)
+            for first_solution_strategy, metaheuristic in PORTFOLIO_STRATEGIES
+            if self._time_limit > 0 or metaheuristic == "AUTOMATIC"
+        ]
+
+        # The strategies are run in rounds of as many strategies as the workers, each round within
+        # an equal share of the time limit
+        workers = get_workers(len(strategies))
+        time_limit = self._time_limit
+        if time_limit > 0:
+            time_limit = max(1, time_limit // ceil(len(strategies) / workers))
+        metadata = json.dumps(
+            {"Description": self._description, "Time Limit": time_limit}
+        )
+        input_data = self._create_input(
+            list(range(len(self._locations))), self._vehicles, self._depot
+        )
+
+        # Child processes are forked from a server process, clear of any threads of the solver
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("forkserver")
+        ) as executor:
+            results = list(
+                executor.map(
+                    solve_strategy,
+                    [metadata] * len(strategies),
+                    [input_data] * len(strategies),
+                    *zip(*strategies),
+                )
+            )
+
+        self._solution = {"objective": "No solution found for the provided parameters"}
+        best = None
+        for (first_solution_strategy, metaheuristic), (
+            result,
+            time_limit_reached,
+        ) in zip(strategies, results):
+            if "routes" not in result:
+                continue
+            if best is None or result["objective"] < best["objective"]:
+                best = result
+                best["strategy"] = {
+                    "firstSolution": first_solution_strategy,
+                    "metaheuristic": metaheuristic,
+                }
+                self._solution = best
+                self._time_limit_reached = time_limit_reached
+
+    def _create_input(self, indexes, vehicles, depot):
+        """
+        Create the input (in JSON format) of a problem over some of the locations, e.g. a cluster
+
+        Keyword arguments:
+        - indexes -- the indexes of the locations of the problem
+        - vehicles -- the number of vehicles of the problem
+        - depot -- the index of the depot in the locations of the problem
+        """
+        input = {
+            "locations": [
+                {"latitude": latitude, "longitude": longitude}
+                for latitude, longitude in [self._locations[index] for index in indexes]
+            ],
+            "vehicles": vehicles,
+            "depot": depot,
+            "maxDistance": self._max_distance,
+        }
+        if self._nearest_neighbors > 0:
+            input["nearestNeighbors"] = self._nearest_neighbors
+        return json.dumps(input)
+
+    def _set_solution_from_routes(self, routes):
+        """
+        Set the solution (same format as the solution of the routing model) from the routes of all vehicles.
+
+        The solution is saved in class-wide _solution variable.
+
+        Keyword arguments:
+        - routes -- the routes of all vehicles (lists of location indexes, from & to the depot), or None if no solution was found
+        """
+        if routes is None:
+            self._solution = {
+                "objective": "No solution found for the provided parameters"
+            }
+            return
+
+        vehicle_routes = []
+        for vehicle_id, route in enumerate(routes):
+            route_distance = int(
+                self._calculate_distances(
+                    np.array(route[:-1], dtype=np.int64),
+                    np.array(route[1:], dtype=np.int64),
+                ).sum()
+            )
+            vehicle_routes.append(
+                {
+                    "vehicle": vehicle_id + 1,
+                    "distance": route_distance,
+                    "locations": route,
+                }
+            )
+
+        # Same objective as the routing model - total distance & span cost of the longest route
+        max_route_distance = max(route["distance"] for route in vehicle_routes)
+        self._solution = {
+            "objective": sum(route["distance"] for route in vehicle_routes)
+            + 100 * max_route_distance,
+            "maxDistance": max_route_distance,
+            "routes": vehicle_routes,
+        }
+
     def _parse_metadata(self, metadata):
         """
         Parse & validate the given metadata JSON
@@ -362,6 +874,112 @@ class VRPSolver(AbstractSolver):
 
         self._max_distance = int(max_distance)
 
+    def _get_nearest_neighbors(self, nearest_neighbors):
+        """
+        Parse and validate the given number of nearest neighbours (optional).
+
+        If positive, the routes only use arcs from each location to its nearest neighbours
+        (and to/from the depot), so that the distance matrix is never calculated (large-instance mode)
+
+        Raises InvalidInputExpression in case of invalid (negative or non-number) value
+
+        Keyword arguments:
+        - nearest_neighbors -- the value specified for number of nearest neighbours (None or 0 to use all arcs)
+        """
+        if nearest_neighbors is None:
+            self._nearest_neighbors = 0
+            return
+
+        try:
+            nearest_neighbors = int(nearest_neighbors)
+        except Exception as e:
+            raise InvalidInputError(
+                f"Invalid value {nearest_neighbors} for parameter 'nearestNeighbors'"
+            )
+
+        if nearest_neighbors < 0:
+            raise InvalidInputError(
+                f"Parameter 'nearestNeighbors' has to be a non-negative integer ({nearest_neighbors})"
+            )
+
+        self._nearest_neighbors = nearest_neighbors
+
+    def _get_clusters(self, clusters):
+        """
+        Parse and validate the given number of clusters (optional).
+
+        If positive, the locations are partitioned into (at most) this many geographic clusters, which are solved
+        in parallel - each one with its share of the vehicles (decomposition mode)
+
+        Raises InvalidInputExpression in case of invalid (negative or non-number) value
+
+        Keyword arguments:
+        - clusters -- the value specified for number of clusters (None or 0 to solve all locations at once)
+        """
+        if clusters is None:
+            self._clusters = 0
+            return
+
+        try:
+            clusters = int(clusters)
+        except Exception as e:
+            raise InvalidInputError(
+                f"Invalid value {clusters} for parameter 'clusters'"
+            )
+
+        if clusters < 0:
+            raise InvalidInputError(
+                f"Parameter 'clusters' has to be a non-negative integer ({clusters})"
+            )
+
+        self._clusters = clusters
+
+    def _get_global_improvement(self, global_improvement):
+        """
+        Parse and validate whether the routes of the clusters are improved by a search
+        over all locations (optional, decomposition mode).
+
+        Raises InvalidInputExpression in case of invalid (non-boolean) value
+
+        Keyword arguments:
+        - global_improvement -- the value specified for global improvement (None for False)
+        """
+        if global_improvement is None:
+            global_improvement = False
+
+        if not isinstance(global_improvement, bool):
+            raise InvalidInputError(
+                f"Parameter 'globalImprovement' has to be a boolean ({global_improvement})"
+            )
+
+        self._global_improvement = global_improvement
+
+    def _get_portfolio(self, portfolio):
+        """
+        Parse and validate whether the problem is solved with multiple search strategies in parallel,
+        keeping the best solution (optional, portfolio mode).
+
+        Raises InvalidInputExpression in case of invalid (non-boolean) value, or if combined with
+        the decomposition or large-instance mode (where the first solution strategies are not used)
+
+        Keyword arguments:
+        - portfolio -- the value specified for portfolio (None for False)
+        """
+        if portfolio is None:
+            portfolio = False
+
+        if not isinstance(portfolio, bool):
+            raise InvalidInputError(
+                f"Parameter 'portfolio' has to be a boolean ({portfolio})"
+            )
+
+        if portfolio and (self._clusters > 0 or self._nearest_neighbors > 0):
+            raise InvalidInputError(
+                "Parameter 'portfolio' can't be combined with 'clusters' or 'nearestNeighbors'"
+            )
+
+        self._portfolio = portfolio
+
     def _haversine_distance(self, lat1, lon1, lat2, lon2):
         """
         Calculate the great-circle distance between two points on the Earth's surface.
@@ -383,20 +1001,90 @@ class VRPSolver(AbstractSolver):
         distance = 6371 * c  # Earth radius in kilometers
         return int(round(1000 * distance))
 
-    def _calculate_distance_matrix(self):
+    def _calculate_distances(self, origins, destinations):
         """
-        Calculate distance matrix between all defined locations,
-        based on Manhattan distance.
+        Calculate the distances (in meters) from origins to destinations, based on the
+        great-circle distance (same values as _haversine_distance).
+
+        Returns an array of distances with the broadcast shape of origins & destinations
+
+        Keyword arguments:
+        - origins -- array with the indexes of the origin locations
+        - destinations -- array with the indexes of the destination locations (broadcastable to origins)
         """
-        num_locations = len(self._locations)
-        distance_matrix = [[0] * num_locations for _ in range(num_locations)]
+        # Trigonometric functions are only evaluated once per location - The sines of the half differences
+        # of each pair are expanded as sin(x - y) = sin(x) * cos(y) - cos(x) * sin(y)
+        if self._trigonometry is None:
+            locations = np.radians(
+                np.array(self._locations, dtype=np.float64).reshape(-1, 2)
+            )
+            latitudes, longitudes = locations[:, 0], locations[:, 1]
+            self._trigonometry = (
+                np.sin(latitudes / 2),
+                np.cos(latitudes / 2),
+                np.sin(longitudes / 2),
+                np.cos(longitudes / 2),
+                np.cos(latitudes),
+            )
+        (
+            sin_half_latitudes,
+            cos_half_latitudes,
+            sin_half_longitudes,
+            cos_half_longitudes,
+            cos_latitudes,
+        ) = self._trigonometry
 
-        for i in range(num_locations):
-            for j in range(num_locations):
-                lat1, lon1 = self._locations[i]
-                lat2, lon2 = self._locations[j]
+        # Haversine formula
+        sin_dlat = (
+            sin_half_latitudes[destinations] * cos_half_latitudes[origins]
+            - cos_half_latitudes[destinations] * sin_half_latitudes[origins]
+        )
+        sin_dlon = (
+            sin_half_longitudes[destinations] * cos_half_longitudes[origins]
+            - cos_half_longitudes[destinations] * sin_half_longitudes[origins]
+        )
+        a = sin_dlat**2 + (
+            cos_latitudes[origins] * cos_latitudes[destinations] * sin_dlon**2
+        )
+        np.clip(a, 0, 1, out=a)
+        distances = 2 * 6371 * 1000 * np.arcsin(np.sqrt(a))
+
+        # Round half to even (as round()) - Distances close to a tie, or between almost
+        # antipodal locations (where the formula is ill-conditioned), are recalculated one by one
+        rounded = np.rint(distances)
+        recalculate = (
+            np.abs(np.abs(distances - rounded) - 0.5) < ROUNDING_TIE_TOLERANCE
+        ) | (a > 1 - ANTIPODAL_TOLERANCE)
+        if recalculate.any():
+            origins, destinations = np.broadcast_arrays(origins, destinations)
+            for index in zip(*np.nonzero(recalculate)):
+                rounded[index] = self._haversine_distance(
+                    *self._locations[origins[index]],
+                    *self._locations[destinations[index]],
+                )
+        return rounded.astype(np.int32)
 
-                distance_matrix[i][j] = self._haversine_distance(lat1, lon1, lat2, lon2)
+    def _calculate_distance_matrix(self):
+        """
+        Calculate distance matrix (in meters) between all defined locations.
+
+        The matrix is symmetric, so only the upper triangle is calculated (in blocks of rows)
+        and mirrored to the lower one
+        """
+        num_locations = len(self._locations)
+        distance_matrix = np.zeros((num_locations, num_locations), dtype=np.int32)
+        block_rows = max(1, DISTANCE_MATRIX_BLOCK_SIZE // max(num_locations, 1))
+        for start in range(0, num_locations, block_rows):
+            end = min(start + block_rows, num_locations)
+            rows, columns = slice(start, end), slice(start, None)
+
+            # From each location of the block to all locations after its start
+            block = self._calculate_distances(
+                np.arange(start, end)[:, np.newaxis],
+                np.arange(start, num_locations)[np.newaxis, :],
+            )
+            distance_matrix[rows, columns] = block
+            distance_matrix[columns, rows] = block.T
         self._distance_matrix = distance_matrix
 
 
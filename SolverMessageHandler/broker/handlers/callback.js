@@ -18,7 +18,9 @@ export const callback = async (topic, message) => {
         message.problemId,
         message.error,
         message.executionTime,
-        message.result
+        message.result,
+        message.timeLimit,
+        message.cached
       );
       break;
     case "problem-execute-resend":
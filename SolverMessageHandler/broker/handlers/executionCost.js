@@ -0,0 +1,15 @@
+/**
+ * Cost (in credits) of a problem's execution result.
+ *
+ * Results answered from the orchestrator's result cache were not executed again,
+ * so they are free - The user was already charged for the execution that produced them.
+ *
+ * @param {number} price Price of the problem's model (credits per second of execution)
+ * @param {number} executionTime Execution time (in seconds)
+ * @param {boolean?} cached True if the result was answered from the result cache
+ * @returns {number} The cost of the result
+ */
+export const getExecutionCost = (price, executionTime, cached) => {
+  if (cached) return 0;
+  return Math.max(Math.round(price * executionTime), 1);
+};
@@ -8,6 +8,7 @@ import {
 } from "../../database/index.js";
 
 import { sendMessage } from "../sendMessage.js";
+import { getExecutionCost } from "./executionCost.js";
 
 /**
  * Message received from broker: Result is ready from a solver (problem execution finished)
@@ -19,12 +20,16 @@ import { sendMessage } from "../sendMessage.js";
  * @param {string?} error If defined, describes the error that occured on submission's input data
  * @param {number?} executionTime Execution time (in seconds)
  * @param {string} result The result object, as a JSON string
+ * @param {number?} timeLimit Time limit (in seconds) applied to the execution (0 if no time limit)
+ * @param {boolean?} cached True if the result was answered from the orchestrator's result cache (not charged)
  */
 export const problemExecutionResult = async (
   id,
   error,
   executionTime,
-  result
+  result,
+  timeLimit,
+  cached
 ) => {
   try {
     // Validate inputs
@@ -65,7 +70,7 @@ export const problemExecutionResult = async (
     if (!executionTime || !result || result === "") return;
 
     const price = problem.modelId.price;
-    const cost = Math.max(Math.round(price * executionTime), 1);
+    const cost = getExecutionCost(price, executionTime, cached);
 
     // Check if the user has sufficient credits
     const suffiecent = problem.userId.credits >= cost;
@@ -76,10 +81,16 @@ export const problemExecutionResult = async (
       executionTime,
       data: result,
       cost,
+      timeLimit: timeLimit || 0,
     });
 
     let isPaid = "but NOT PAID";
-    if (suffiecent) {
+    if (cached) {
+      // Answered from the result cache - Nothing to charge
+      problemResult.isAvailable = true;
+      isPaid = "from the result cache (NOT CHARGED)";
+    }
+    else if (suffiecent) {
       problemResult.isAvailable = true;
       isPaid = "and PAID";
 
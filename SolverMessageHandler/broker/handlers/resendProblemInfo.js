@@ -59,6 +59,7 @@ export const resendProblemInfo = async (id) => {
     const problemData = {
       problemId: problem._id,
       modelId: problem.modelId.id,
+      userId: problem.userId,
       inputData: inputData.data,
       metadata: JSON.stringify(metadata),
     };
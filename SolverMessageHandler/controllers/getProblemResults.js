@@ -49,6 +49,7 @@ export const getProblemResults = async (req, res) => {
       model: { id: problem.modelId.id, name: problem.modelId.name },
       executedOn: result.executedOn,
       executionTime: result.executionTime,
+      timeLimit: result.timeLimit,
       cost: result.cost,
       isAvailable: result.isAvailable,
       data: result.isAvailable ? result.data : null,
@@ -68,6 +68,7 @@ export const sendProblemToSolver = async (req, res) => {
     const problemData = {
       problemId: problem._id,
       modelId: problem.modelId.id,
+      userId: problem.userId,
       inputData: inputData.data,
       metadata: JSON.stringify(metadata),
     };
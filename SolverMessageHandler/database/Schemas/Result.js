@@ -32,6 +32,11 @@ const ResultSchema = new mongoose.Schema(
       required: true,
       default: 0.0,
     },
+    timeLimit: {
+      type: Number,
+      required: true,
+      default: 0,
+    },
   },
   {
     collection: "results",
@@ -0,0 +1,17 @@
+import { test } from "node:test";
+import assert from "node:assert/strict";
+
+import { getExecutionCost } from "../broker/handlers/executionCost.js";
+
+test("executed results are charged by execution time", () => {
+  assert.equal(getExecutionCost(2, 10.4, false), 21);
+  assert.equal(getExecutionCost(2, 10.4, undefined), 21);
+});
+
+test("executed results are charged at least 1 credit", () => {
+  assert.equal(getExecutionCost(1, 0.1, false), 1);
+});
+
+test("cached results are not charged again", () => {
+  assert.equal(getExecutionCost(2, 10.4, true), 0);
+});
@@ -1,25 +1,110 @@
 import redis
 
+# Add a key to the queue & save its value in the index - If the key already exists, only its value is updated
+ENQUEUE_SCRIPT = """
+if redis.call('HSETNX', KEYS[2], ARGV[1], ARGV[2]) == 0 then
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+    return 0
+end
+if ARGV[3] == '1' then
+    redis.call('RPUSH', KEYS[1], ARGV[1])
+else
+    redis.call('LPUSH', KEYS[1], ARGV[1])
+end
+return 1
+"""
+
+# Lua fragment: Remove the tail of the queue (buffer[1]) along with its value from the index (buffer[2]),
+# leaving the removed value (or nil if the queue is empty) in 'value'
+POP_FRAGMENT = """
+local value = nil
+local key = redis.call('RPOP', buffer[1])
+if key then
+    value = redis.call('HGET', buffer[2], key)
+    redis.call('HDEL', buffer[2], key)
+end
+"""
+
+# Remove the tail of the queue along with its value from the index
+DEQUEUE_SCRIPT = (
+    """
+local buffer = KEYS
+"""
+    + POP_FRAGMENT
+    + """
+return value
+"""
+)
+
+# Get the value of the tail of the queue
+PEEK_SCRIPT = """
+local key = redis.call('LINDEX', KEYS[1], -1)
+if not key then
+    return nil
+end
+return redis.call('HGET', KEYS[2], key)
+"""
+
+# Remove a key from the index & its (single) occurrence from the queue, keeping the order of the rest
+DELETE_SCRIPT = """
+if redis.call('HDEL', KEYS[2], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('LREM', KEYS[1], 1, ARGV[1])
+return 1
+"""
+
 
 class BufferFIFO:
     """
-    Implements a FIFO queue of JSON strings using Redis' list as a buffer
+    Implements a FIFO queue of JSON strings using Redis' list as a buffer.
+
+    The list only holds the keys of the entries, while the values are kept in a Redis hash
+    (index) next to it, so that lookups & removals by key cost a constant number of round trips
     """
 
-    def __init__(self, name, host, port, compare=lambda x, y: x == y):
+    def __init__(self, name, host, port, key=lambda x: x, connection_pool=None):
         """
         Keyword arguments:
         - name -- the name of the buffer
         - host -- host name or IP of Redis
         - port -- connection port of Redis
-        - compare -- function to be used when comparing a value to an entry of the buffer - returns True if equal otherwise false,
-        e.g. lambda entry, value : entry["id"] == value
+        - key -- function to be used for extracting the unique key of a value added to the buffer,
+        e.g. lambda value : json.loads(value)["id"]
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
         """
         self._name = name
-        self._compare = compare
+        self._index = f"{name}:index"
+        self._key = key
 
         # Initialize Redis connection
-        self._redis = redis.Redis(host=host, port=port, decode_responses=True)
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+        # Register the scripts that keep the queue & its index in sync
+        self._enqueue_script = self._redis.register_script(ENQUEUE_SCRIPT)
+        self._dequeue_script = self._redis.register_script(DEQUEUE_SCRIPT)
+        self._peek_script = self._redis.register_script(PEEK_SCRIPT)
+        self._delete_script = self._redis.register_script(DELETE_SCRIPT)
+
+    def get_pop_fragment(self):
+        """
+        Get the Lua fragment that removes the next value from the buffer (to be embedded in other scripts).
+
+        The fragment expects the keys returned by get_keys() in a 'buffer' table,
+        and leaves the removed value (or nil) in 'value'
+        """
+        return POP_FRAGMENT
+
+    def get_keys(self):
+        """
+        Get the Redis keys of the queue & its index, in the order expected by the pop fragment
+        """
+        return [self._name, self._index]
 
     def is_empty(self):
         """
@@ -32,71 +117,72 @@ class BufferFIFO:
         except:
             return True
 
-    def enqueue(self, value, consume_first=False):
+    def get_length(self):
         """
-        Add a value to the start (head) of the FIFO queue
+        Returns the number of values in the buffer
+        """
+        return self._redis.llen(self._name)
+
+    def enqueue(self, value, consume_first=False, pipeline=None):
+        """
+        Add a value to the start (head) of the FIFO queue.
+
+        If a value with the same key already exists in the queue, it is replaced
+        without changing its position.
 
         Keyword arguments:
         - value -- the value to be added
         - consume_first -- if True the value will be added to the end (tail) of the queue (in order to get consumed first) (default False)
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
         """
-        if consume_first:
-            self._redis.rpush(self._name, value)
-        else:
-            self._redis.lpush(self._name, value)
+        self._enqueue_script(
+            keys=[self._name, self._index],
+            args=[self._key(value), value, 1 if consume_first else 0],
+            client=pipeline,
+        )
 
     def dequeue(self):
         """
         Get the tail of the queue and remove from the queue
         """
-        return self._redis.rpop(self._name)
+        return self._dequeue_script(keys=[self._name, self._index])
 
     def peek(self):
         """
         Get the tail of the queue without removing it from the queue
         """
-        tail = self._redis.rpop(self._name)
-        self._redis.rpush(self._name, tail)
-        return tail
+        return self._peek_script(keys=[self._name, self._index])
 
-    def find(self, value):
+    def find(self, key, pipeline=None):
         """
-        Find a value in the queue.
+        Find a value in the queue by its key.
 
         Returns the value if found, otherwise None
 
         Keyword arguments:
-        - value -- the value to be found
+        - key -- the key of the value to be found
+        - pipeline -- if given, the command is queued on this Redis pipeline and the
+        result is returned by its execute() (default None)
         """
-        buffer_length = self._redis.llen(self._name)
-        for i in range(buffer_length):
-            current = self._redis.lindex(self._name, i)
-
-            if self._compare(current, value):
-                return current
+        if pipeline is not None:
+            pipeline.hget(self._index, key)
+            return None
+        return self._redis.hget(self._index, key)
 
-        return None
-
-    def delete(self, value):
+    def delete(self, key, pipeline=None):
         """
-        Delete a value from the queue.
+        Delete a value from the queue by its key.
 
         Returns True if the value was found and deleted, otherwise False
 
         Keyword arguments:
-        - value -- the value to be deleted from the queue
+        - key -- the key of the value to be deleted from the queue
+        - pipeline -- if given, the command is queued on this Redis pipeline and the
+        result (1 if deleted, otherwise 0) is returned by its execute() (default None)
         """
-        temp_buffer = []
-        deleted = False
-
-        while not self.is_empty() and not deleted:
-            current = self.dequeue()
-            if self._compare(current, value):
-                deleted = True
-            else:
-                temp_buffer.append(current)
-
-        for v in reversed(temp_buffer):
-            self.enqueue(v, True)
-
-        return deleted
+        if pipeline is not None:
+            self._delete_script(
+                keys=[self._name, self._index], args=[key], client=pipeline
+            )
+            return None
+        return self._delete_script(keys=[self._name, self._index], args=[key]) == 1
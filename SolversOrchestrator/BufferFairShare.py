@@ -0,0 +1,307 @@
+import redis
+
+# Keys of the buffer (KEYS / buffer table):
+# 1. sorted set of users with waiting values, scored by the finish tag of their first value
+# 2. index: key -> value
+# 3. owners: key -> user
+# 4. tags: key -> finish tag
+# 5. last finish tag of each user: user -> tag
+# 6. virtual time of the buffer (the tag of the last removed value)
+# Each user's values are kept in a list named "{users set}:{user}"
+
+# Add a key to the queue of its user & save its value in the index - If the key already exists, only its value
+# is updated. The finish tag of the value is the virtual time when the user's previous value finishes
+# (or the current virtual time if later) plus the cost of the value divided by the user's weight.
+# If consume_first is set, the key is added in front of its user's queue with the current virtual time as tag
+ENQUEUE_SCRIPT = """
+if redis.call('HSETNX', KEYS[2], ARGV[1], ARGV[3]) == 0 then
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[3])
+    return 0
+end
+local queue = KEYS[1] .. ':' .. ARGV[2]
+local now = tonumber(redis.call('GET', KEYS[6]) or '0')
+local tag
+if ARGV[5] == '1' then
+    tag = now
+    redis.call('LPUSH', queue, ARGV[1])
+else
+    local last = tonumber(redis.call('HGET', KEYS[5], ARGV[2]) or '0')
+    tag = math.max(now, last) + tonumber(ARGV[4])
+    redis.call('HSET', KEYS[5], ARGV[2], tag)
+    redis.call('RPUSH', queue, ARGV[1])
+end
+redis.call('HSET', KEYS[3], ARGV[1], ARGV[2])
+redis.call('HSET', KEYS[4], ARGV[1], tag)
+local head = redis.call('LINDEX', queue, 0)
+redis.call('ZADD', KEYS[1], redis.call('HGET', KEYS[4], head), ARGV[2])
+return 1
+"""
+
+# Lua fragment: Remove the first value of the user with the lowest finish tag along with its entries
+# in the index, owners & tags (buffer[1]..buffer[6]), leaving the removed value (or nil if the queue
+# is empty) in 'value'
+POP_FRAGMENT = """
+local value = nil
+local user = redis.call('ZRANGE', buffer[1], 0, 0)[1]
+if user then
+    local queue = buffer[1] .. ':' .. user
+    local key = redis.call('LPOP', queue)
+    value = redis.call('HGET', buffer[2], key)
+    redis.call('SET', buffer[6], redis.call('HGET', buffer[4], key))
+    redis.call('HDEL', buffer[2], key)
+    redis.call('HDEL', buffer[3], key)
+    redis.call('HDEL', buffer[4], key)
+    local head = redis.call('LINDEX', queue, 0)
+    if head then
+        redis.call('ZADD', buffer[1], redis.call('HGET', buffer[4], head), user)
+    else
+        redis.call('ZREM', buffer[1], user)
+        redis.call('HDEL', buffer[5], user)
+    end
+end
+"""
+
+# Remove the next value along with its entries in the index, owners & tags
+DEQUEUE_SCRIPT = (
+    """
+local buffer = KEYS
+"""
+    + POP_FRAGMENT
+    + """
+return value
+"""
+)
+
+# Get the next value
+PEEK_SCRIPT = """
+local user = redis.call('ZRANGE', KEYS[1], 0, 0)[1]
+if not user then
+    return nil
+end
+return redis.call('HGET', KEYS[2], redis.call('LINDEX', KEYS[1] .. ':' .. user, 0))
+"""
+
+# Remove a key from the index, owners, tags & the queue of its user
+DELETE_SCRIPT = """
+local user = redis.call('HGET', KEYS[3], ARGV[1])
+if not user then
+    return 0
+end
+local queue = KEYS[1] .. ':' .. user
+redis.call('LREM', queue, 1, ARGV[1])
+redis.call('HDEL', KEYS[2], ARGV[1])
+redis.call('HDEL', KEYS[3], ARGV[1])
+redis.call('HDEL', KEYS[4], ARGV[1])
+local head = redis.call('LINDEX', queue, 0)
+if head then
+    redis.call('ZADD', KEYS[1], redis.call('HGET', KEYS[4], head), user)
+else
+    redis.call('ZREM', KEYS[1], user)
+    redis.call('HDEL', KEYS[5], user)
+end
+return 1
+"""
+
+# Get each user with waiting values, along with the length of its queue & its first value
+QUEUES_SCRIPT = """
+local result = {}
+for _, user in ipairs(redis.call('ZRANGE', KEYS[1], 0, -1)) do
+    local queue = KEYS[1] .. ':' .. user
+    local head = redis.call('LINDEX', queue, 0)
+    table.insert(result, user)
+    table.insert(result, redis.call('LLEN', queue))
+    table.insert(result, redis.call('HGET', KEYS[2], head))
+end
+return result
+"""
+
+
+class BufferFairShare:
+    """
+    Implements a weighted fair queue of JSON strings using Redis - Each user has its own FIFO queue
+    (Redis list), and the users take turns according to their weights (weighted fair queueing):
+    every value gets a virtual finish tag and the first value of the user with the lowest tag is consumed first,
+    so that a user with weight 2 gets twice as many values (or twice the cost) consumed as a user with weight 1
+    while both have waiting values.
+
+    Same interface as BufferFIFO - The queues only hold the keys of the entries,
+    while the values are kept in a Redis hash (index) next to them
+    """
+
+    def __init__(
+        self,
+        name,
+        host,
+        port,
+        key=lambda x: x,
+        user=lambda x: "",
+        cost=lambda x: 1,
+        weights=None,
+        default_weight=1,
+        connection_pool=None,
+    ):
+        """
+        Keyword arguments:
+        - name -- the name of the buffer
+        - host -- host name or IP of Redis
+        - port -- connection port of Redis
+        - key -- function to be used for extracting the unique key of a value added to the buffer,
+        e.g. lambda value : json.loads(value)["id"]
+        - user -- function to be used for extracting the user (owner) of a value added to the buffer,
+        e.g. lambda value : json.loads(value)["userId"]
+        - cost -- function to be used for calculating the cost of a value added to the buffer (default 1 for every value)
+        - weights -- dict with the weight of each user (default None - all users have the default weight)
+        - default_weight -- weight of the users that are not included in weights (default 1)
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
+        """
+        self._name = name
+        self._keys = [
+            f"{name}:users",
+            f"{name}:index",
+            f"{name}:owners",
+            f"{name}:tags",
+            f"{name}:last",
+            f"{name}:vtime",
+        ]
+        self._key = key
+        self._user = user
+        self._cost = cost
+        self._weights = weights or {}
+        self._default_weight = default_weight
+
+        # Initialize Redis connection
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+        # Register the scripts that keep the queues & their index in sync
+        self._enqueue_script = self._redis.register_script(ENQUEUE_SCRIPT)
+        self._dequeue_script = self._redis.register_script(DEQUEUE_SCRIPT)
+        self._peek_script = self._redis.register_script(PEEK_SCRIPT)
+        self._delete_script = self._redis.register_script(DELETE_SCRIPT)
+        self._queues_script = self._redis.register_script(QUEUES_SCRIPT)
+
+    def get_pop_fragment(self):
+        """
+        Get the Lua fragment that removes the next value from the buffer (to be embedded in other scripts).
+
+        The fragment expects the keys returned by get_keys() in a 'buffer' table,
+        and leaves the removed value (or nil) in 'value'
+        """
+        return POP_FRAGMENT
+
+    def get_keys(self):
+        """
+        Get the Redis keys of the buffer, in the order expected by the pop fragment
+        """
+        return list(self._keys)
+
+    def get_weight(self, user):
+        """
+        Get the weight of a user
+
+        Keyword arguments:
+        - user -- the user
+        """
+        return self._weights.get(user, self._default_weight)
+
+    def is_empty(self):
+        """
+        Returns True is the buffer is empty, otherwise False
+        """
+        try:
+            # Check the number of users with waiting values
+            users = self._redis.zcard(self._keys[0])
+            return users == 0
+        except:
+            return True
+
+    def get_length(self):
+        """
+        Returns the number of values in the buffer
+        """
+        return self._redis.hlen(self._keys[1])
+
+    def enqueue(self, value, consume_first=False, pipeline=None):
+        """
+        Add a value to the end of its user's queue.
+
+        If a value with the same key already exists in the buffer, it is replaced
+        without changing its position.
+
+        Keyword arguments:
+        - value -- the value to be added
+        - consume_first -- if True the value will be added in front of all values of the buffer (in order to get consumed first) (default False)
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        user = self._user(value)
+        self._enqueue_script(
+            keys=self._keys,
+            args=[
+                self._key(value),
+                user,
+                value,
+                self._cost(value) / self.get_weight(user),
+                1 if consume_first else 0,
+            ],
+            client=pipeline,
+        )
+
+    def dequeue(self):
+        """
+        Get the next value (first value of the user with the lowest finish tag) and remove from the buffer
+        """
+        return self._dequeue_script(keys=self._keys)
+
+    def peek(self):
+        """
+        Get the next value (first value of the user with the lowest finish tag) without removing it from the buffer
+        """
+        return self._peek_script(keys=self._keys)
+
+    def find(self, key, pipeline=None):
+        """
+        Find a value in the buffer by its key.
+
+        Returns the value if found, otherwise None
+
+        Keyword arguments:
+        - key -- the key of the value to be found
+        - pipeline -- if given, the command is queued on this Redis pipeline and the
+        result is returned by its execute() (default None)
+        """
+        if pipeline is not None:
+            pipeline.hget(self._keys[1], key)
+            return None
+        return self._redis.hget(self._keys[1], key)
+
+    def delete(self, key, pipeline=None):
+        """
+        Delete a value from the buffer by its key.
+
+        Returns True if the value was found and deleted, otherwise False
+
+        Keyword arguments:
+        - key -- the key of the value to be deleted from the buffer
+        - pipeline -- if given, the command is queued on this Redis pipeline and the
+        result (1 if deleted, otherwise 0) is returned by its execute() (default None)
+        """
+        if pipeline is not None:
+            self._delete_script(keys=self._keys, args=[key], client=pipeline)
+            return None
+        return self._delete_script(keys=self._keys, args=[key]) == 1
+
+    def get_queues(self):
+        """
+        Get the queues of the users with waiting values.
+
+        Returns a dict with the users as keys and a tuple with the number of waiting values
+        & the first value of each user's queue as values
+        """
+        result = self._queues_script(keys=self._keys)
+        return {
+            result[i]: (result[i + 1], result[i + 2]) for i in range(0, len(result), 3)
+        }
@@ -0,0 +1,190 @@
+import redis
+
+# Find a key in the indexes of the partitions (KEYS) & return its value (or nil if not found)
+FIND_SCRIPT = """
+for _, index in ipairs(KEYS) do
+    local value = redis.call('HGET', index, ARGV[1])
+    if value then
+        return value
+    end
+end
+return nil
+"""
+
+
+class BufferPartitioned:
+    """
+    Splits a buffer into partitions (e.g. one per model), each one being a separate buffer
+    of the same type, so that the values of each partition can be consumed independently
+    (see Dispatcher) and a burst of values in one partition doesn't hold back the others.
+
+    Same interface as BufferFIFO for adding, finding & deleting values - The partitions are
+    created on first use (named "{name}:partition:{partition}") and their names are kept in a Redis set,
+    so that they are known to all instances sharing the buffer
+    """
+
+    def __init__(
+        self,
+        name,
+        host,
+        port,
+        partition,
+        create_buffer,
+        connection_pool=None,
+    ):
+        """
+        Keyword arguments:
+        - name -- the name of the buffer
+        - host -- host name or IP of Redis
+        - port -- connection port of Redis
+        - partition -- function to be used for extracting the partition of a value added to the buffer,
+        e.g. lambda value : json.loads(value)["modelId"]
+        - create_buffer -- function to be used for creating the buffer of a partition, given its name,
+        e.g. lambda name : BufferFIFO(name, host, port)
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
+        """
+        self._name = name
+        self._partitions_name = f"{name}:partitions"
+        self._partition = partition
+        self._create_buffer = create_buffer
+        self._buffers = {}
+
+        # Initialize Redis connection
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+        self._find_script = self._redis.register_script(FIND_SCRIPT)
+
+        self.get_partitions()
+
+    def _create_partition(self, partition):
+        """
+        Create the buffer of a partition
+
+        Keyword arguments:
+        - partition -- the name of the partition
+        """
+        return self._create_buffer(f"{self._name}:partition:{partition}")
+
+    def get_buffer(self, partition, pipeline=None):
+        """
+        Get the buffer of a partition (created if it doesn't exist)
+
+        Keyword arguments:
+        - partition -- the name of the partition
+        - pipeline -- if given, the command registering a new partition is queued on this Redis pipeline instead of being executed (default None)
+        """
+        if partition not in self._buffers:
+            client = self._redis if pipeline is None else pipeline
+            client.sadd(self._partitions_name, partition)
+            self._buffers[partition] = self._create_partition(partition)
+        return self._buffers[partition]
+
+    def get_partitions(self):
+        """
+        Get the buffers of all partitions, including the ones created by other instances
+        """
+        for partition in self._redis.smembers(self._partitions_name):
+            if partition not in self._buffers:
+                self._buffers[partition] = self._create_partition(partition)
+        return dict(self._buffers)
+
+    def get_pop_fragment(self):
+        """
+        Get the Lua fragment that removes the next value from a partition (same for all partitions).
+
+        Returns None if there are no partitions
+        """
+        for buffer in self._buffers.values():
+            return buffer.get_pop_fragment()
+        return None
+
+    def is_empty(self):
+        """
+        Returns True is the buffer is empty, otherwise False
+        """
+        return all(buffer.is_empty() for buffer in self.get_partitions().values())
+
+    def get_length(self):
+        """
+        Returns the number of values in the buffer
+        """
+        return sum(buffer.get_length() for buffer in self.get_partitions().values())
+
+    def enqueue(self, value, consume_first=False, pipeline=None):
+        """
+        Add a value to the buffer of its partition.
+
+        Keyword arguments:
+        - value -- the value to be added
+        - consume_first -- if True the value will be added in front of all values of its partition (in order to get consumed first) (default False)
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        buffer = self.get_buffer(self._partition(value), pipeline)
+        buffer.enqueue(value, consume_first, pipeline)
+
+    def find(self, key, pipeline=None):
+        """
+        Find a value in any partition by its key.
+
+        Returns the value if found, otherwise None
+
+        Keyword arguments:
+        - key -- the key of the value to be found
+        - pipeline -- if given, the command is queued on this Redis pipeline and the
+        result is returned by its execute() (default None)
+        """
+        # The index of every buffer type is the second of its keys
+        indexes = [buffer.get_keys()[1] for buffer in self._buffers.values()]
+        if pipeline is not None:
+            self._find_script(keys=indexes, args=[key], client=pipeline)
+            return None
+        return self._find_script(keys=indexes, args=[key])
+
+    def delete(self, key, pipeline=None):
+        """
+        Delete a value from the buffer by its key.
+
+        Returns True if the value was found and deleted, otherwise False
+
+        Keyword arguments:
+        - key -- the key of the value to be deleted from the buffer
+        - pipeline -- if given, the command is queued on this Redis pipeline for each partition and the
+        results (1 if deleted, otherwise 0) are returned by its execute() (default None)
+        """
+        if pipeline is not None:
+            for buffer in self._buffers.values():
+                buffer.delete(key, pipeline)
+            return None
+        return any([buffer.delete(key) for buffer in self._buffers.values()])
+
+    def get_weight(self, user):
+        """
+        Get the weight of a user (fair share partitions)
+
+        Keyword arguments:
+        - user -- the user
+        """
+        for buffer in self._buffers.values():
+            return buffer.get_weight(user)
+        return None
+
+    def get_queues(self):
+        """
+        Get the queues of the users with waiting values in any partition (fair share partitions).
+
+        Returns a dict with the users as keys and a tuple with the number of waiting values
+        & the first value of each user's queue (in the first partition found) as values
+        """
+        queues = {}
+        for buffer in self.get_partitions().values():
+            for user, (depth, first) in buffer.get_queues().items():
+                if user in queues:
+                    queues[user] = (queues[user][0] + depth, queues[user][1])
+                else:
+                    queues[user] = (depth, first)
+        return queues
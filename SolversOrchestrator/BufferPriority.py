@@ -0,0 +1,209 @@
+import redis
+
+# Add a key to the queue with the given score & save its value in the index - If the key already exists,
+# only its value is updated. If consume_first is set, the key gets a score lower than all others
+ENQUEUE_SCRIPT = """
+if redis.call('HSETNX', KEYS[2], ARGV[1], ARGV[2]) == 0 then
+    redis.call('HSET', KEYS[2], ARGV[1], ARGV[2])
+    return 0
+end
+local score = tonumber(ARGV[3])
+if ARGV[4] == '1' then
+    local first = redis.call('ZRANGE', KEYS[1], 0, 0, 'WITHSCORES')
+    if #first > 0 then
+        score = math.min(score, tonumber(first[2]) - 1)
+    end
+end
+redis.call('ZADD', KEYS[1], score, ARGV[1])
+return 1
+"""
+
+# Lua fragment: Remove the entry with the lowest score (buffer[1]) along with its value from the index (buffer[2]),
+# leaving the removed value (or nil if the queue is empty) in 'value'
+POP_FRAGMENT = """
+local value = nil
+local popped = redis.call('ZPOPMIN', buffer[1])
+if #popped > 0 then
+    value = redis.call('HGET', buffer[2], popped[1])
+    redis.call('HDEL', buffer[2], popped[1])
+end
+"""
+
+# Remove the entry with the lowest score along with its value from the index
+DEQUEUE_SCRIPT = (
+    """
+local buffer = KEYS
+"""
+    + POP_FRAGMENT
+    + """
+return value
+"""
+)
+
+# Get the value of the entry with the lowest score
+PEEK_SCRIPT = """
+local first = redis.call('ZRANGE', KEYS[1], 0, 0)
+if #first == 0 then
+    return nil
+end
+return redis.call('HGET', KEYS[2], first[1])
+"""
+
+# Remove a key from the index & the queue
+DELETE_SCRIPT = """
+if redis.call('HDEL', KEYS[2], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+class BufferPriority:
+    """
+    Implements a priority queue of JSON strings using Redis' sorted set as a buffer.
+    Entries with the lowest score are consumed first (entries with equal scores in lexicographical order of their keys).
+
+    Same interface as BufferFIFO - The sorted set only holds the keys of the entries,
+    while the values are kept in a Redis hash (index) next to it
+    """
+
+    def __init__(
+        self,
+        name,
+        host,
+        port,
+        key=lambda x: x,
+        score=lambda x: 0,
+        connection_pool=None,
+    ):
+        """
+        Keyword arguments:
+        - name -- the name of the buffer
+        - host -- host name or IP of Redis
+        - port -- connection port of Redis
+        - key -- function to be used for extracting the unique key of a value added to the buffer,
+        e.g. lambda value : json.loads(value)["id"]
+        - score -- function to be used for calculating the score (priority) of a value added to the buffer,
+        e.g. lambda value : json.loads(value)["cost"]
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
+        """
+        self._name = name
+        self._index = f"{name}:index"
+        self._key = key
+        self._score = score
+
+        # Initialize Redis connection
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+        # Register the scripts that keep the queue & its index in sync
+        self._enqueue_script = self._redis.register_script(ENQUEUE_SCRIPT)
+        self._dequeue_script = self._redis.register_script(DEQUEUE_SCRIPT)
+        self._peek_script = self._redis.register_script(PEEK_SCRIPT)
+        self._delete_script = self._redis.register_script(DELETE_SCRIPT)
+
+    def get_pop_fragment(self):
+        """
+        Get the Lua fragment that removes the next value from the buffer (to be embedded in other scripts).
+
+        The fragment expects the keys returned by get_keys() in a 'buffer' table,
+        and leaves the removed value (or nil) in 'value'
+        """
+        return POP_FRAGMENT
+
+    def get_keys(self):
+        """
+        Get the Redis keys of the queue & its index, in the order expected by the pop fragment
+        """
+        return [self._name, self._index]
+
+    def is_empty(self):
+        """
+        Returns True is the buffer is empty, otherwise False
+        """
+        try:
+            # Check the length of the queue
+            buffer_length = self._redis.zcard(self._name)
+            return buffer_length == 0
+        except:
+            return True
+
+    def get_length(self):
+        """
+        Returns the number of values in the buffer
+        """
+        return self._redis.zcard(self._name)
+
+    def enqueue(self, value, consume_first=False, pipeline=None):
+        """
+        Add a value to the queue, according to its score.
+
+        If a value with the same key already exists in the queue, it is replaced
+        without changing its position.
+
+        Keyword arguments:
+        - value -- the value to be added
+        - consume_first -- if True the value will be added in front of all values of the queue (in order to get consumed first) (default False)
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        self._enqueue_script(
+            keys=[self._name, self._index],
+            args=[
+                self._key(value),
+                value,
+                self._score(value),
+                1 if consume_first else 0,
+            ],
+            client=pipeline,
+        )
+
+    def dequeue(self):
+        """
+        Get the value with the lowest score and remove from the queue
+        """
+        return self._dequeue_script(keys=[self._name, self._index])
+
+    def peek(self):
+        """
+        Get the value with the lowest score without removing it from the queue
+        """
+        return self._peek_script(keys=[self._name, self._index])
+
+    def find(self, key, pipeline=None):
+        """
+        Find a value in the queue by its key.
+
+        Returns the value if found, otherwise None
+
+        Keyword arguments:
+        - key -- the key of the value to be found
+        - pipeline -- if given, the command is queued on this Redis pipeline and the
+        result is returned by its execute() (default None)
+        """
+        if pipeline is not None:
+            pipeline.hget(self._index, key)
+            return None
+        return self._redis.hget(self._index, key)
+
+    def delete(self, key, pipeline=None):
+        """
+        Delete a value from the queue by its key.
+
+        Returns True if the value was found and deleted, otherwise False
+
+        Keyword arguments:
+        - key -- the key of the value to be deleted from the queue
+        - pipeline -- if given, the command is queued on this Redis pipeline and the
+        result (1 if deleted, otherwise 0) is returned by its execute() (default None)
+        """
+        if pipeline is not None:
+            self._delete_script(
+                keys=[self._name, self._index], args=[key], client=pipeline
+            )
+            return None
+        return self._delete_script(keys=[self._name, self._index], args=[key]) == 1
@@ -0,0 +1,145 @@
+import redis
+
+# Pop an idle solver that serves the partition's model, pop the next problem from the partition
+# and save it as the solver's pending request - all in one atomic step.
+# A solver serves the model if it declared it, or if it didn't declare any models (not registered).
+# Solvers are popped from the idle set of the model, then from the set of solvers serving any model - Stale entries
+# (not idle anymore, or models changed) are dropped, so each assignment takes O(1) amortized, regardless of the idle solvers.
+# Nothing is assigned unless the leader lease is held by the given holder (if any), so that a replica that lost
+# the lease without noticing (e.g. paused for longer than the lease time) cannot assign problems
+# KEYS: idle solvers set, active requests hash, solvers serving the model, registered solvers' info,
+# idle solvers serving the model, idle solvers serving any model, leader lease, buffer keys...
+# ARGV: holder of the leader lease (empty for no check)
+DISPATCH_SCRIPT = """
+if ARGV[1] ~= '' and redis.call('GET', KEYS[7]) ~= ARGV[1] then
+    return nil
+end
+local idle_name, info_name = KEYS[1], KEYS[4]
+%s
+local solver_id = nil
+local source = nil
+for _, key in ipairs({KEYS[5], KEYS[6]}) do
+    while not solver_id do
+        local candidate = redis.call('SPOP', key)
+        if not candidate then
+            break
+        end
+        if redis.call('SISMEMBER', idle_name, candidate) == 1 then
+            if redis.call('SISMEMBER', KEYS[3], candidate) == 1 or redis.call('HEXISTS', info_name, candidate) == 0 then
+                solver_id = candidate
+                source = key
+            else
+                -- Registered or models changed while idle - Moved to the idle sets of the models it serves
+                set_idle(candidate, true)
+            end
+        end
+    end
+end
+if not solver_id then
+    return nil
+end
+local buffer = {unpack(KEYS, 8)}
+%s
+if not value then
+    redis.call('SADD', source, solver_id)
+    return nil
+end
+set_idle(solver_id, false)
+redis.call('HSET', KEYS[2], solver_id, value)
+return {solver_id, value}
+"""
+
+
+class Dispatcher:
+    """
+    Assigns buffered problems to available solvers that serve their model, using a server-side Redis script
+    so that each assignment takes a single round trip and cannot be interrupted half-way.
+
+    The problems of each model are kept in a separate partition of the buffer, and the models take turns
+    """
+
+    def __init__(
+        self,
+        host,
+        port,
+        buffer,
+        idle_solvers,
+        requests_name,
+        registry,
+        lease=None,
+        connection_pool=None,
+    ):
+        """
+        Keyword arguments:
+        - host -- host name or IP of Redis
+        - port -- connection port of Redis
+        - buffer -- the buffer holding the problems waiting to be assigned, partitioned by model (see BufferPartitioned)
+        - idle_solvers -- the sets of idle solvers, overall & per model (see IdleSolvers)
+        - requests_name -- the name of the solvers' active requests hash (see RequestManager)
+        - registry -- the registry of the solvers, along with the models they serve (see SolverRegistry)
+        - lease -- if given, the leader lease that has to be held by this replica for problems to be assigned (see LeaderLease) (default None)
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
+        """
+        self._buffer = buffer
+        self._idle_solvers = idle_solvers
+        self._requests_name = requests_name
+        self._registry = registry
+        self._lease = lease
+        self._dispatch_script = None
+        # Model to be dispatched first on the next call
+        self._next_model = 0
+
+        # Initialize Redis connection
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+    def dispatch(self):
+        """
+        Assign the next problem of a model to an available solver that serves the model - The models
+        are tried in turns, starting from the one after the model of the last assignment.
+
+        A solver is considered to be available if it's status is EMPTY (no assigned problem)
+        and there is no pending request towards the solver (i.e. it's in the idle solvers' set).
+
+        Returns a tuple with the solver's ID and the assigned value, or None
+        if all solvers are busy or the buffer is empty
+        """
+        partitions = sorted(self._buffer.get_partitions().items())
+        if not partitions:
+            return None
+
+        # Register the dispatch script, embedding the idle sets' update & the buffer's pop logic (same for all partitions)
+        if self._dispatch_script is None:
+            self._dispatch_script = self._redis.register_script(
+                DISPATCH_SCRIPT
+                % (
+                    self._idle_solvers.get_set_idle_fragment(),
+                    self._buffer.get_pop_fragment(),
+                )
+            )
+
+        for turn in range(len(partitions)):
+            index = (self._next_model + turn) % len(partitions)
+            model, buffer = partitions[index]
+            assignment = self._dispatch_script(
+                keys=[
+                    self._idle_solvers.get_name(),
+                    self._requests_name,
+                    self._registry.get_model_key(model),
+                    self._idle_solvers.get_info_name(),
+                    self._idle_solvers.get_model_key(model),
+                    self._idle_solvers.get_any_key(),
+                    self._lease.get_key() if self._lease else "",
+                ]
+                + buffer.get_keys(),
+                args=[self._lease.get_holder() if self._lease else ""],
+            )
+            if assignment:
+                self._next_model = index + 1
+                solver_id, value = assignment
+                return solver_id, value
+        return None
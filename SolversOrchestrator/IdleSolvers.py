@@ -0,0 +1,243 @@
+import redis
+
+EMPTY = ""
+
+# Lua fragment: Add/remove a solver ('solver_id') to/from the idle set ('idle_name') & the idle sets of the models
+# it serves, according to its info in the solvers' registry ('info_name'). The idle set of each model is named
+# "{idle_name}:model:{model}", and solvers without info (not registered, thus serving any model) are kept in "{idle_name}:any".
+# Entries of the model sets may be stale (e.g. models changed while idle), so a solver popped from them
+# has to be checked to be in the idle set & serve the model
+SET_IDLE_FRAGMENT = """
+local function set_idle(solver_id, idle)
+    local command = idle and 'SADD' or 'SREM'
+    redis.call(command, idle_name, solver_id)
+    local info = redis.call('HGET', info_name, solver_id)
+    if info then
+        for _, model in ipairs(cjson.decode(info)['models'] or {}) do
+            redis.call(command, idle_name .. ':model:' .. model, solver_id)
+        end
+    else
+        redis.call(command, idle_name .. ':any', solver_id)
+    end
+end
+"""
+
+# Update a solver's field in the status or requests hash (KEYS[1]), and add/remove the solver
+# to/from the idle sets (KEYS[4]) depending on its current status (KEYS[2]) & request (KEYS[3])
+# and the models in its info (KEYS[5])
+UPDATE_SCRIPT = (
+    """
+local idle_name, info_name = KEYS[4], KEYS[5]
+"""
+    + SET_IDLE_FRAGMENT
+    + """
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+local status = redis.call('HGET', KEYS[2], ARGV[1])
+local request = redis.call('HGET', KEYS[3], ARGV[1])
+set_idle(ARGV[1], status == ARGV[3] and (not request or request == ARGV[3]))
+"""
+)
+
+# Add/remove a solver to/from the idle sets (KEYS[3]) depending on its current status (KEYS[1]) & request (KEYS[2]),
+# e.g. when the models in its info (KEYS[4]) changed
+REFRESH_SCRIPT = (
+    """
+local idle_name, info_name = KEYS[3], KEYS[4]
+"""
+    + SET_IDLE_FRAGMENT
+    + """
+local status = redis.call('HGET', KEYS[1], ARGV[1])
+local request = redis.call('HGET', KEYS[2], ARGV[1])
+set_idle(ARGV[1], status == ARGV[2] and (not request or request == ARGV[2]))
+"""
+)
+
+# Remove a solver from the idle sets (KEYS[1]), according to the models in its info (KEYS[2])
+REMOVE_SCRIPT = (
+    """
+local idle_name, info_name = KEYS[1], KEYS[2]
+"""
+    + SET_IDLE_FRAGMENT
+    + """
+set_idle(ARGV[1], false)
+"""
+)
+
+# Rebuild the idle sets (KEYS[3] & the sets of the models given as the rest of the keys) from the
+# status (KEYS[1]) & requests (KEYS[2]) hashes and the models in the solvers' info (KEYS[4])
+REBUILD_SCRIPT = (
+    """
+local idle_name, info_name = KEYS[3], KEYS[4]
+"""
+    + SET_IDLE_FRAGMENT
+    + """
+redis.call('DEL', idle_name, idle_name .. ':any', unpack(KEYS, 5))
+local statuses = redis.call('HGETALL', KEYS[1])
+for i = 1, #statuses, 2 do
+    if statuses[i + 1] == ARGV[1] then
+        local request = redis.call('HGET', KEYS[2], statuses[i])
+        if not request or request == ARGV[1] then
+            set_idle(statuses[i], true)
+        end
+    end
+end
+return redis.call('SCARD', idle_name)
+"""
+)
+
+
+class IdleSolvers:
+    """
+    Maintains a Redis set with the solvers that are free, i.e. solvers whose status is EMPTY
+    (no assigned problem) and have no pending request, along with a set of the free solvers per model.
+
+    The sets are updated atomically along with the status & requests hashes,
+    so that finding a free solver for a model is a single set operation
+    """
+
+    def __init__(
+        self,
+        name,
+        host,
+        port,
+        status_name,
+        requests_name,
+        info_name,
+        connection_pool=None,
+    ):
+        """
+        Keyword arguments:
+        - name -- the name of the set
+        - host -- host name or IP of Redis
+        - port -- connection port of Redis
+        - status_name -- the name of the solvers' status hash (see StatusManager)
+        - requests_name -- the name of the solvers' active requests hash (see RequestManager)
+        - info_name -- the name of the solvers' info hash, including the models they serve (see SolverRegistry)
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
+        """
+        self._name = name
+        self._status_name = status_name
+        self._requests_name = requests_name
+        self._info_name = info_name
+
+        # Initialize Redis connection
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+        self._update_script = self._redis.register_script(UPDATE_SCRIPT)
+        self._refresh_script = self._redis.register_script(REFRESH_SCRIPT)
+        self._remove_script = self._redis.register_script(REMOVE_SCRIPT)
+        self._rebuild_script = self._redis.register_script(REBUILD_SCRIPT)
+
+    def get_name(self):
+        """
+        Getter - Returns the name of the set
+        """
+        return self._name
+
+    def get_info_name(self):
+        """
+        Getter - Returns the name of the solvers' info hash
+        """
+        return self._info_name
+
+    def get_model_key(self, model):
+        """
+        Get the Redis key of the set of free solvers serving a model
+
+        Keyword arguments:
+        - model -- the unique identifier of the model
+        """
+        return f"{self._name}:model:{model}"
+
+    def get_any_key(self):
+        """
+        Get the Redis key of the set of free solvers without info (serving any model)
+        """
+        return f"{self._name}:any"
+
+    def get_set_idle_fragment(self):
+        """
+        Get the Lua fragment defining set_idle(solver_id, idle), which adds/removes a solver to/from
+        the idle sets (to be embedded in other scripts).
+
+        The fragment expects the names of the idle set & the solvers' info hash in 'idle_name' & 'info_name'
+        """
+        return SET_IDLE_FRAGMENT
+
+    def update(self, hash_name, solver_id, value, pipeline=None):
+        """
+        Update the value of a solver in the status or requests hash, and refresh
+        whether the solver is idle
+
+        Keyword arguments:
+        - hash_name -- the name of the hash to be updated (status or requests hash)
+        - solver_id -- the unique identifier of the solver
+        - value -- new value to be updated
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        self._update_script(
+            keys=[
+                hash_name,
+                self._status_name,
+                self._requests_name,
+                self._name,
+                self._info_name,
+            ],
+            args=[solver_id, value, EMPTY],
+            client=pipeline,
+        )
+
+    def refresh(self, solver_id, pipeline=None):
+        """
+        Refresh the idle sets of the models a solver serves, e.g. when the models it serves changed
+
+        Keyword arguments:
+        - solver_id -- the unique identifier of the solver
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        self._refresh_script(
+            keys=[
+                self._status_name,
+                self._requests_name,
+                self._name,
+                self._info_name,
+            ],
+            args=[solver_id, EMPTY],
+            client=pipeline,
+        )
+
+    def remove(self, solver_id, pipeline=None):
+        """
+        Remove a solver from the sets (e.g. when the solver is no longer available)
+
+        Keyword arguments:
+        - solver_id -- the unique identifier of the solver
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        self._remove_script(
+            keys=[self._name, self._info_name], args=[solver_id], client=pipeline
+        )
+
+    def rebuild(self):
+        """
+        Rebuild the sets from the current contents of the status & requests hashes.
+
+        Returns the number of idle solvers
+        """
+        model_keys = list(self._redis.scan_iter(match=self.get_model_key("*")))
+        return self._rebuild_script(
+            keys=[self._status_name, self._requests_name, self._name, self._info_name]
+            + model_keys,
+            args=[EMPTY],
+        )
+
+    def get_solvers(self):
+        """
+        Get the IDs of all idle solvers
+        """
+        return self._redis.smembers(self._name)
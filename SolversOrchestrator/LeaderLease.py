@@ -0,0 +1,155 @@
+import time
+
+import redis
+
+# The time of the last renewal is retained for this many lease times - Acquisitions after a longer
+# time (e.g. all replicas were down) are not counted as failovers
+RENEWAL_RETENTION = 10
+
+# Acquire the lease if no one holds it - If acquired after another holder, count the failover
+# & save the time (in seconds) since the last renewal of the previous holder
+# KEYS: lease, time of last renewal, number of failovers, duration of last failover
+# ARGV: holder, lease time (in milliseconds), current time, retention of the time of last renewal (in milliseconds)
+ACQUIRE_SCRIPT = """
+if not redis.call('SET', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 0
+end
+local renewed = redis.call('GET', KEYS[2])
+if renewed then
+    redis.call('INCR', KEYS[3])
+    redis.call('SET', KEYS[4], tonumber(ARGV[3]) - tonumber(renewed))
+end
+redis.call('SET', KEYS[2], ARGV[3], 'PX', ARGV[4])
+return 1
+"""
+
+# Extend the lease if still held by the given holder
+# KEYS: lease, time of last renewal
+# ARGV: holder, lease time (in milliseconds), current time, retention of the time of last renewal (in milliseconds)
+RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+redis.call('SET', KEYS[2], ARGV[3], 'PX', ARGV[4])
+return 1
+"""
+
+# Release the lease if held by the given holder, so that another holder can acquire it immediately
+# KEYS: lease, time of last renewal
+# ARGV: holder
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1], KEYS[2])
+return 1
+"""
+
+
+class LeaderLease:
+    """
+    Elects a single leader among multiple replicas using a lease in Redis - The lease is held by one
+    replica at a time and expires unless renewed, so that another replica takes over when the leader fails.
+
+    Failovers (acquisitions while the previous holder had not released the lease) are counted,
+    along with the time from the last renewal of the previous holder to the takeover
+    """
+
+    def __init__(self, name, holder, host, port, lease_time=5, connection_pool=None):
+        """
+        Keyword arguments:
+        - name -- the name of the lease (prefix of its keys)
+        - holder -- the unique identifier of this replica
+        - host -- host name or IP of Redis
+        - port -- connection port of Redis
+        - lease_time -- how long (in seconds) is the lease held without renewal (default 5)
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
+        """
+        self._keys = [
+            name,
+            f"{name}:renewed",
+            f"{name}:failovers",
+            f"{name}:failover_time",
+        ]
+        self._holder = holder
+        self._lease_time_ms = int(lease_time * 1000)
+
+        # Initialize Redis connection
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+        self._acquire_script = self._redis.register_script(ACQUIRE_SCRIPT)
+        self._renew_script = self._redis.register_script(RENEW_SCRIPT)
+        self._release_script = self._redis.register_script(RELEASE_SCRIPT)
+
+    def get_key(self):
+        """
+        Get the Redis key of the lease (holds the ID of the current holder)
+        """
+        return self._keys[0]
+
+    def get_holder(self):
+        """
+        Get the unique identifier of this replica
+        """
+        return self._holder
+
+    def acquire(self):
+        """
+        Try to acquire the lease.
+
+        Returns True if acquired, otherwise False (held by another replica)
+        """
+        return (
+            self._acquire_script(
+                keys=self._keys,
+                args=[
+                    self._holder,
+                    self._lease_time_ms,
+                    time.time(),
+                    self._lease_time_ms * RENEWAL_RETENTION,
+                ],
+            )
+            == 1
+        )
+
+    def renew(self):
+        """
+        Extend the lease.
+
+        Returns True if the lease is still held by this replica, otherwise False (expired & acquired by another replica)
+        """
+        return (
+            self._renew_script(
+                keys=self._keys[:2],
+                args=[
+                    self._holder,
+                    self._lease_time_ms,
+                    time.time(),
+                    self._lease_time_ms * RENEWAL_RETENTION,
+                ],
+            )
+            == 1
+        )
+
+    def release(self):
+        """
+        Release the lease (if held by this replica)
+        """
+        self._release_script(keys=self._keys[:2], args=[self._holder])
+
+    def get_stats(self):
+        """
+        Get the current holder of the lease, the number of failovers & the duration (in seconds) of the last failover
+        """
+        holder, _, failovers, failover_time = self._redis.mget(self._keys)
+        return {
+            "holder": holder,
+            "failovers": int(failovers or 0),
+            "failoverTime": float(failover_time) if failover_time else None,
+        }
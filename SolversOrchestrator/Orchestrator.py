@@ -1,4 +1,6 @@
 import os
+import time
+import socket
 import signal
 import json
 import logging
@@ -6,19 +8,41 @@ import logging.config
 from logging.handlers import TimedRotatingFileHandler
 from datetime import datetime
 from functools import wraps
+from collections import deque
 
 from dotenv import load_dotenv
 from confluent_kafka import Consumer, Producer, KafkaError, KafkaException
+from confluent_kafka.admin import AdminClient, NewTopic
 import redis
 from flask import Flask, jsonify, request
 import jwt
 
 from BufferFIFO import BufferFIFO
+from BufferPriority import BufferPriority
+from BufferFairShare import BufferFairShare
+from BufferPartitioned import BufferPartitioned
 from StatusManager import StatusManager
 from RequestManager import RequestManager
+from IdleSolvers import IdleSolvers
+from Dispatcher import Dispatcher
+from ProblemStore import ProblemStore
+from ResultCache import ResultCache
+from SolverRegistry import SolverRegistry
+from LeaderLease import LeaderLease
 
 LOG_DIRECTORY = "./logs"
 EMPTY = ""
+WORK_TOPIC = "problem-execute-work"
+
+# Estimated execution time (in seconds) per unit of a problem's size, used for cost-aware scheduling
+COST_PER_LOCATION_PAIR = (
+    1e-5  # VRP: Distance matrix & routing search grow with the square of locations
+)
+COST_PER_CONSTRAINT = 1e-3  # LP
+COST_PER_INPUT_BYTE = 1e-6  # Unknown models
+
+# Problems without deadline are scheduled after all problems with deadline (in order of arrival) on edf
+NO_DEADLINE_DELAY = 10 * 365 * 24 * 3600
 
 
 class Orchestrator:
@@ -34,14 +58,120 @@ class Orchestrator:
 
         self._broker_uri = os.getenv("BROKER_URI")
 
+        # Multiple replicas can be run - Only the replica holding the leader lease consumes & dispatches problems,
+        # while the others take over if the lease is not renewed within the lease time (in seconds)
+        self._replica_id = os.getenv("REPLICA_ID") or socket.gethostname()
+        self._leader_lease_time = float(os.getenv("LEADER_LEASE_TIME", "5"))
+        # Time (in seconds) after which the consumer of a leader that stopped without leaving the group is removed
+        # from the consumer group - The new leader receives messages only after that, so it adds to the failover time
+        self._consumer_session_timeout = float(
+            os.getenv("CONSUMER_SESSION_TIMEOUT", "45")
+        )
+
         self._redis_host = os.getenv("REDIS_HOST")
         self._redis_port = int(os.getenv("REDIS_PORT"))
 
-        self._solvers = int(os.getenv("SOLVERS"))
+        # Number of solvers to request the status from on startup - Solvers that send heartbeats
+        # are registered automatically, and are considered unavailable if no heartbeat is received within the lease time (in seconds)
+        self._solvers = int(os.getenv("SOLVERS", "0"))
+        self._solver_lease_time = float(os.getenv("SOLVER_LEASE_TIME", "15"))
+        # How problems reach the solvers:
+        # - push: the orchestrator queues the problems & assigns each one to a free solver on its own topic
+        # - pull: the problems are published on a shared work topic, consumed by the solvers when they have free capacity
+        self._dispatch_mode = os.getenv("DISPATCH_MODE", "push").lower()
+        # Number of partitions of the work topic - Limits the number of solvers consuming work (pull)
+        self._work_topic_partitions = int(os.getenv("WORK_TOPIC_PARTITIONS", "12"))
         # Retention time for deleted & executed problems in seconds
         self._deletions_retention_time = int(os.getenv("RETAIN_DELETED_PROBLEMS"))
         self._executed_retention_time = int(os.getenv("RETAIN_EXECUTED_PROBLEMS"))
 
+        # Retention time (in seconds) & compression of the problems' payloads stored in Redis
+        self._payload_retention_time = int(os.getenv("PROBLEM_PAYLOAD_TTL", "86400"))
+        self._payload_compression = (
+            os.getenv("PROBLEM_PAYLOAD_COMPRESSION", "true").lower() == "true"
+        )
+
+        # Cache of results for identical submissions: retention time (in seconds), maximum number of entries
+        # and whether results of executions cut short by the time limit can be cached
+        self._result_cache_enabled = (
+            os.getenv("RESULT_CACHE", "false").lower() == "true"
+        )
+        self._result_cache_ttl = int(os.getenv("RESULT_CACHE_TTL", "86400"))
+        self._result_cache_max_entries = int(
+            os.getenv("RESULT_CACHE_MAX_ENTRIES", "10000")
+        )
+        self._result_cache_time_limited = (
+            os.getenv("RESULT_CACHE_TIME_LIMITED", "false").lower() == "true"
+        )
+
+        # In-memory copy of solvers' status & requests, and how often (in seconds) to compare it with Redis
+        self._state_cache = os.getenv("STATE_CACHE", "false").lower() == "true"
+        self._state_cache_check_interval = int(
+            os.getenv("STATE_CACHE_CHECK_INTERVAL", "60")
+        )
+
+        # Order in which queued problems are assigned to solvers:
+        # - fifo: in order of arrival
+        # - sjf: shortest (estimated) job first, with waiting problems aging towards the front
+        # - fair: each user has its own queue, and users take turns according to their weights
+        # - edf: earliest deadline first
+        self._scheduling_policy = os.getenv("SCHEDULING_POLICY", "fifo").lower()
+        # Seconds of estimated cost forgiven for each second a problem waits in the queue (sjf)
+        self._sjf_aging_rate = float(os.getenv("SJF_AGING_RATE", "1"))
+        # Weights of users in the format "userId:weight,userId:weight" & weight of all other users (fair)
+        self._fair_share_weights = {}
+        for entry in os.getenv("FAIR_SHARE_WEIGHTS", "").split(","):
+            if ":" in entry:
+                user_id, weight = entry.rsplit(":", 1)
+                if float(weight) > 0:
+                    self._fair_share_weights[user_id.strip()] = float(weight)
+        self._fair_share_default_weight = float(
+            os.getenv("FAIR_SHARE_DEFAULT_WEIGHT", "1")
+        )
+        # Time (in seconds) from submission to deadline for each SLA class in the format "class:seconds,class:seconds",
+        # class of each user in the format "userId:class,userId:class" & class of all other submissions - The deadline
+        # of a submission is given by its 'deadline' or derived from its 'slaClass' (or the user's class)
+        self._sla_classes = {}
+        for entry in os.getenv("SLA_CLASSES", "").split(","):
+            if ":" in entry:
+                sla_class, seconds = entry.rsplit(":", 1)
+                self._sla_classes[sla_class.strip()] = float(seconds)
+        self._sla_user_classes = {}
+        for entry in os.getenv("SLA_USER_CLASSES", "").split(","):
+            if ":" in entry:
+                user_id, sla_class = entry.rsplit(":", 1)
+                self._sla_user_classes[user_id.strip()] = sla_class.strip()
+        self._sla_default_class = os.getenv("SLA_DEFAULT_CLASS", EMPTY)
+
+        # Shorten the time limit of dispatched problems when the queue backs up: the time limit (in seconds) is
+        # scaled down from the ceiling when the estimated time to drain the queue (from the mean execution time of
+        # recent executions) exceeds the target, but never below the floor
+        self._adaptive_time_limit = (
+            os.getenv("ADAPTIVE_TIME_LIMIT", "false").lower() == "true"
+        )
+        self._adaptive_time_limit_floor = int(
+            os.getenv("ADAPTIVE_TIME_LIMIT_FLOOR", "30")
+        )
+        self._adaptive_time_limit_ceiling = int(
+            os.getenv("ADAPTIVE_TIME_LIMIT_CEILING", "7200")
+        )
+        self._adaptive_time_limit_target = float(
+            os.getenv("ADAPTIVE_TIME_LIMIT_TARGET", "600")
+        )
+        self._recent_execution_times = deque(
+            maxlen=int(os.getenv("ADAPTIVE_TIME_LIMIT_WINDOW", "20"))
+        )
+        self._time_limit = self._adaptive_time_limit_ceiling
+
+        # Maximum number of messages & time to wait (in seconds) on each consume call
+        self._consume_batch_size = int(os.getenv("CONSUME_BATCH_SIZE", "100"))
+        self._consume_timeout = float(os.getenv("CONSUME_TIMEOUT", "0.1"))
+
+        # Producer's batching configuration & maximum time (in seconds) to wait for pending deliveries on shutdown
+        self._producer_linger_ms = int(os.getenv("PRODUCER_LINGER_MS", "5"))
+        self._producer_batch_size = int(os.getenv("PRODUCER_BATCH_SIZE", "1000"))
+        self._producer_flush_timeout = float(os.getenv("PRODUCER_FLUSH_TIMEOUT", "5"))
+
         # Initialize logger
         if not os.path.exists(LOG_DIRECTORY):
             os.makedirs(LOG_DIRECTORY)
@@ -53,22 +183,23 @@ class Orchestrator:
                 handler.extMatch = handler.extMatch
         self._logger.info("OR-Tools Solver Orchestrator started")
 
-        # Initialize Redis connection
-        self._redis = redis.Redis(
+        # Initialize Redis connection pool - Shared by the orchestrator & all state managers
+        self._redis_pool = redis.ConnectionPool(
             host=self._redis_host, port=self._redis_port, decode_responses=True
         )
+        self._redis = redis.Redis(connection_pool=self._redis_pool)
 
         def problem_equals_id(problem_json, problem_id):
             """
-            Helper methood: Compares the JSON of a problem submission
-            with a given ID, and returns True if the submission object's
+            Helper methood: Compares the JSON of a queued problem
+            with a given ID, and returns True if the object's
             ID is equal to the given ID.
 
             Intended to be used as comparator callback on generic objects
 
             Keyword arguments:
-            - problem_json -- the problem submission in JSON format, including the problem's ID,
-            solver's ID, model, metadata & input data
+            - problem_json -- the queued problem in JSON format, including the problem's ID
+            & scheduling attributes (see _get_attributes)
             - problem_id -- the ID of the problem to check for equality with the problem above
             """
             try:
@@ -77,86 +208,447 @@ class Orchestrator:
             except:
                 return False
 
-        self._problems_buffer = BufferFIFO(
-            "problems_buffer", self._redis_host, self._redis_port, problem_equals_id
+        self._problem_equals_id = problem_equals_id
+
+        def problem_id_of(problem_json):
+            """
+            Helper method: Returns the ID of a queued problem given in JSON format.
+
+            Intended to be used as key callback on generic objects
+
+            Keyword arguments:
+            - problem_json -- the queued problem in JSON format, including the problem's ID
+            & scheduling attributes (see _get_attributes)
+            """
+            return json.loads(problem_json)["problemId"]
+
+        self._problem_store = ProblemStore(
+            "problem",
+            self._redis_host,
+            self._redis_port,
+            ttl=self._payload_retention_time,
+            compress=self._payload_compression,
+            connection_pool=self._redis_pool,
+        )
+        self._result_cache = ResultCache(
+            "result_cache",
+            self._redis_host,
+            self._redis_port,
+            ttl=self._result_cache_ttl,
+            max_entries=self._result_cache_max_entries,
+            connection_pool=self._redis_pool,
+        )
+
+        def problem_score_of(problem_json):
+            """
+            Helper method: Returns the score of a queued problem given in JSON format, so that
+            cheaper problems are assigned first and every second of waiting lowers the score by the aging rate.
+
+            Intended to be used as score callback on priority buffers
+
+            Keyword arguments:
+            - problem_json -- the queued problem in JSON format, including the problem's ID
+            & scheduling attributes (see _get_attributes)
+            """
+            problem = json.loads(problem_json)
+            return problem["cost"] + self._sjf_aging_rate * problem["queuedAt"]
+
+        def problem_user_of(problem_json):
+            """
+            Helper method: Returns the ID of the user that submitted a queued problem given in JSON format.
+
+            Intended to be used as user callback on fair share buffers
+
+            Keyword arguments:
+            - problem_json -- the queued problem in JSON format, including the problem's ID
+            & scheduling attributes (see _get_attributes)
+            """
+            return json.loads(problem_json).get("userId") or EMPTY
+
+        def problem_deadline_of(problem_json):
+            """
+            Helper method: Returns the deadline of a queued problem given in JSON format
+            (problems without deadline are placed far in the future, in order of arrival).
+
+            Intended to be used as score callback on priority buffers
+
+            Keyword arguments:
+            - problem_json -- the queued problem in JSON format, including the problem's ID
+            & scheduling attributes (see _get_attributes)
+            """
+            problem = json.loads(problem_json)
+            if problem.get("deadline") is None:
+                return problem["queuedAt"] + NO_DEADLINE_DELAY
+            return problem["deadline"]
+
+        def problem_model_of(problem_json):
+            """
+            Helper method: Returns the model of a queued problem given in JSON format.
+
+            Intended to be used as partition callback on partitioned buffers
+
+            Keyword arguments:
+            - problem_json -- the queued problem in JSON format, including the problem's ID
+            & scheduling attributes (see _get_attributes)
+            """
+            return json.loads(problem_json).get("modelId") or EMPTY
+
+        if self._scheduling_policy not in ["fifo", "sjf", "edf", "fair"]:
+            self._logger.warning(
+                f"Unknown scheduling policy '{self._scheduling_policy}' - Using 'fifo'"
+            )
+            self._scheduling_policy = "fifo"
+
+        def create_buffer(name):
+            """
+            Helper method: Creates a buffer of the scheduling policy with the given name.
+
+            Intended to be used for creating the partitions of the problems' buffer
+
+            Keyword arguments:
+            - name -- the name of the buffer
+            """
+            if self._scheduling_policy == "sjf":
+                return BufferPriority(
+                    name,
+                    self._redis_host,
+                    self._redis_port,
+                    problem_id_of,
+                    problem_score_of,
+                    connection_pool=self._redis_pool,
+                )
+            if self._scheduling_policy == "edf":
+                return BufferPriority(
+                    name,
+                    self._redis_host,
+                    self._redis_port,
+                    problem_id_of,
+                    problem_deadline_of,
+                    connection_pool=self._redis_pool,
+                )
+            if self._scheduling_policy == "fair":
+                return BufferFairShare(
+                    name,
+                    self._redis_host,
+                    self._redis_port,
+                    problem_id_of,
+                    problem_user_of,
+                    weights=self._fair_share_weights,
+                    default_weight=self._fair_share_default_weight,
+                    connection_pool=self._redis_pool,
+                )
+            return BufferFIFO(
+                name,
+                self._redis_host,
+                self._redis_port,
+                problem_id_of,
+                connection_pool=self._redis_pool,
+            )
+
+        # The problems of each model are queued separately, so that they are assigned only to solvers
+        # serving the model, and the models take turns on assignment
+        buffer_name = {
+            "fifo": "problems_buffer",
+            "sjf": "problems_buffer_sjf",
+            "edf": "problems_buffer_edf",
+            "fair": "problems_buffer_fair",
+        }[self._scheduling_policy]
+        self._problems_buffer = BufferPartitioned(
+            buffer_name,
+            self._redis_host,
+            self._redis_port,
+            problem_model_of,
+            create_buffer,
+            connection_pool=self._redis_pool,
+        )
+        # Kept for moving the problems queued before the buffer was partitioned by model (see _start_leading)
+        self._create_buffer = create_buffer
+        self._buffer_name = buffer_name
+
+        self._solver_registry = SolverRegistry(
+            "solver_registry",
+            self._redis_host,
+            self._redis_port,
+            lease_time=self._solver_lease_time,
+            connection_pool=self._redis_pool,
+        )
+        self._idle_solvers = IdleSolvers(
+            "idle_solvers",
+            self._redis_host,
+            self._redis_port,
+            "solver_status",
+            "active_requests",
+            self._solver_registry.get_info_key(),
+            connection_pool=self._redis_pool,
         )
         self._solver_manager = StatusManager(
-            "solver_status", self._redis_host, self._redis_port
+            "solver_status",
+            self._redis_host,
+            self._redis_port,
+            idle_solvers=self._idle_solvers,
+            cache=self._state_cache,
+            connection_pool=self._redis_pool,
         )
         self._request_manager = RequestManager(
-            "active_requests", self._redis_host, self._redis_port, problem_equals_id
+            "active_requests",
+            self._redis_host,
+            self._redis_port,
+            problem_equals_id,
+            idle_solvers=self._idle_solvers,
+            cache=self._state_cache,
+            connection_pool=self._redis_pool,
+        )
+        self._leader_lease = LeaderLease(
+            "orchestrator_leader",
+            self._replica_id,
+            self._redis_host,
+            self._redis_port,
+            lease_time=self._leader_lease_time,
+            connection_pool=self._redis_pool,
+        )
+        self._dispatcher = Dispatcher(
+            self._redis_host,
+            self._redis_port,
+            self._problems_buffer,
+            self._idle_solvers,
+            "active_requests",
+            self._solver_registry,
+            lease=self._leader_lease,
+            connection_pool=self._redis_pool,
         )
 
-        # Send messages to all solvers to find their status
-        for solver_id in range(self._solvers):
-            self._send_message(
-                f"problem-execute-req-{solver_id+1}",
-                {"problemId": None},
-            )
+        # Initialize the Kafka producer - A single producer is shared by all messages,
+        # and delivery callbacks are served from the consumer loop
+        self._producer = Producer(
+            {
+                "bootstrap.servers": self._broker_uri,
+                "linger.ms": self._producer_linger_ms,
+                "batch.num.messages": self._producer_batch_size,
+            }
+        )
 
-        self._consumers = []
+        if self._dispatch_mode == "pull":
+            self._create_work_topic()
+
+        self._is_leader = False
+        self._last_lease_renewal = None
+        # Time (monotonic) at which this replica became the leader
+        self._leading_since = None
+
+        self._consumer = None
+        # Whether the consumer has partitions assigned, i.e. heartbeats are being received
+        self._consumer_assigned = False
+
+        # Total time (in seconds) that the assigned problems waited in the queue & number of assigned problems
+        self._queue_wait_time = 0.0
+        self._queue_wait_count = 0
 
         # Initialize flask app
         self._app = Flask(__name__)
         self._setup_routes()
 
-    def _get_available_solver(self):
+    def _create_work_topic(self):
+        """
+        Create the shared work topic (if it doesn't exist) with enough partitions
+        to be consumed by multiple solvers
+        """
+        admin = AdminClient({"bootstrap.servers": self._broker_uri})
+        futures = admin.create_topics(
+            [
+                NewTopic(
+                    WORK_TOPIC,
+                    num_partitions=self._work_topic_partitions,
+                    replication_factor=1,
+                )
+            ]
+        )
+        for topic, future in futures.items():
+            try:
+                future.result()
+                self._logger.info(
+                    f"Created topic {topic} with {self._work_topic_partitions} partitions"
+                )
+            except KafkaException as e:
+                if e.args[0].code() != KafkaError.TOPIC_ALREADY_EXISTS:
+                    self._logger.error(f"Failed to create topic {topic}: {str(e)}")
+            except Exception as e:
+                self._logger.error(f"Failed to create topic {topic}: {str(e)}")
+
+    def _get_attributes(self, problem):
         """
-        Find the first available OR-Tools solver.
+        Get the attributes of a problem submission that are kept in the queue & the
+        solvers' requests (the full submission is kept in the problem store).
 
-        A solver is considered to be available if it's status is EMPTY (no assigned problem)
-        and there is no pending request towards the solver.
+        Returns a dict with the problem's ID, model, user, size of input data,
+        estimated cost (in seconds), time it was added to the queue & deadline (timestamps in seconds)
 
-        Return the solver's ID, or None if all solvers are busy
+        Keyword arguments:
+        - problem -- the problem submission as a dict, including the problem's ID,
+        solver's ID, model, metadata & input data
         """
-        solvers = self._solver_manager.get_solvers()
-        for solver_id, problem_id in solvers.items():
-            # Solver without assigned problem ID was found
-            if problem_id == EMPTY:
-                # Check if there is a pending request for this solver
-                current_request = self._request_manager.get_request(solver_id)
-                if current_request is None or current_request == EMPTY:
-                    return solver_id
-        return None
+        input_data = problem.get("inputData")
+        queued_at = datetime.now().timestamp()
+        return {
+            "problemId": problem.get("problemId"),
+            "modelId": problem.get("modelId"),
+            "userId": problem.get("userId"),
+            "size": len(input_data) if isinstance(input_data, str) else 0,
+            "cost": self._estimate_cost(problem),
+            "queuedAt": queued_at,
+            "deadline": self._get_deadline(problem, queued_at),
+        }
 
-    def _assign_problem_to_solver(self, problem):
+    def _get_deadline(self, problem, submitted_at):
         """
-        Try to assign a problem read from the broker to an
-        available solver.
+        Get the deadline (timestamp in seconds) of a problem submission.
 
-        If all solvers are busy, add to buffer (queue)
+        The deadline is given by the submission (as timestamp in seconds or ISO 8601 date), or derived
+        from the submission time & the time allowed by its SLA class. Submissions without SLA class
+        (or with an unknown class) have no deadline (None)
 
         Keyword arguments:
         - problem -- the problem submission as a dict, including the problem's ID,
         solver's ID, model, metadata & input data
+        - submitted_at -- the time the problem was submitted (timestamp in seconds)
         """
-        solver_id = self._get_available_solver()
-        if solver_id is not None:
-            topic = f"problem-execute-req-{solver_id}"
-            self._request_manager.update_request(solver_id, json.dumps(problem))
-            self._logger.info(
-                f"Assigned problem {problem['problemId']} to solver {solver_id}"
+        deadline = problem.get("deadline")
+        try:
+            if isinstance(deadline, (int, float)):
+                return float(deadline)
+            if isinstance(deadline, str):
+                return datetime.fromisoformat(deadline).timestamp()
+        except:
+            self._logger.warning(
+                f"Invalid deadline {deadline} for problem {problem.get('problemId')}"
             )
-            self._send_message(topic, problem)
-        else:
-            self._problems_buffer.enqueue(json.dumps(problem))
-            self._logger.info(
-                f"No available solvers - Add {problem['problemId']} to queue"
+
+        sla_class = problem.get("slaClass") or self._sla_user_classes.get(
+            problem.get("userId"), self._sla_default_class
+        )
+        if sla_class in self._sla_classes:
+            return submitted_at + self._sla_classes[sla_class]
+        return None
+
+    def _estimate_cost(self, problem):
+        """
+        Estimate the execution time (in seconds) of a problem submission.
+
+        The model is recognized by the contents of the input data (locations for VRP,
+        constraints for LP), and the estimate is capped by the requested time limit (if any)
+
+        Keyword arguments:
+        - problem -- the problem submission as a dict, including the problem's ID,
+        solver's ID, model, metadata & input data
+        """
+        input_data = problem.get("inputData")
+        size = len(input_data) if isinstance(input_data, str) else 0
+        cost = size * COST_PER_INPUT_BYTE
+        try:
+            data = json.loads(input_data)
+            if isinstance(data.get("locations"), list):
+                cost = len(data["locations"]) ** 2 * COST_PER_LOCATION_PAIR
+            elif isinstance(data.get("constraints"), list):
+                cost = len(data["constraints"]) * COST_PER_CONSTRAINT
+        except:
+            pass
+
+        try:
+            time_limit = int(json.loads(problem.get("metadata"))["Time Limit"])
+            if time_limit > 0:
+                cost = min(cost, time_limit)
+        except:
+            pass
+
+        return cost
+
+    def _get_time_limit(self):
+        """
+        Get the time limit (in seconds) to be applied to dispatched problems, based on the number of
+        waiting problems & the mean execution time of recent executions.
+
+        If the queue can be drained within the target time, the ceiling is returned - Otherwise,
+        the ceiling is scaled down by the ratio of target to estimated time (but not below the floor)
+        """
+        if not self._recent_execution_times:
+            return self._adaptive_time_limit_ceiling
+
+        mean_execution_time = sum(self._recent_execution_times) / len(
+            self._recent_execution_times
+        )
+        # Every known solver (or slot of a solver) counts as a separate unit of capacity
+        solvers = len(self._solver_manager.get_solvers()) or max(self._solvers, 1)
+        drain_time = self._problems_buffer.get_length() * mean_execution_time / solvers
+        if drain_time <= self._adaptive_time_limit_target:
+            return self._adaptive_time_limit_ceiling
+
+        time_limit = int(
+            self._adaptive_time_limit_ceiling
+            * self._adaptive_time_limit_target
+            / drain_time
+        )
+        return max(self._adaptive_time_limit_floor, time_limit)
+
+    def _assign_problem_to_solver(self, solver_id, buffered_problem, time_limit=None):
+        """
+        Send a problem that was dispatched from the buffer to the solver
+        it was assigned to.
+
+        The full submission is loaded from the problem store - If it's not available
+        (e.g. expired), the request is cleared and the problem is requested again
+
+        Keyword arguments:
+        - solver_id -- the unique identifier of the solver
+        - buffered_problem -- the queued problem in JSON format, including the problem's ID
+        & scheduling attributes (see _get_attributes)
+        - time_limit -- if given, the maximum time limit (in seconds) the solver should apply (default None)
+        """
+        attributes = json.loads(buffered_problem)
+        problem_id = attributes["problemId"]
+        problem = self._problem_store.load(problem_id)
+        if problem is None:
+            self._logger.error(
+                f"Submission of problem {problem_id} not found - Requesting again"
             )
+            self._request_manager.update_request(solver_id, EMPTY)
+            self._send_message("problem-execute-resend", {"problemId": problem_id})
+            return
+
+        if "queuedAt" in attributes:
+            self._queue_wait_time += datetime.now().timestamp() - attributes["queuedAt"]
+            self._queue_wait_count += 1
+
+        if time_limit is not None:
+            problem["timeLimit"] = time_limit
+
+        topic = f"problem-execute-req-{solver_id}"
+        self._logger.info(f"Assigned problem {problem_id} to solver {solver_id}")
+        self._send_message(topic, problem)
 
     def _process_buffer(self):
         """
-        Check if there are available solvers, and assign problems from the FIFO buffer
+        Check if there are available solvers, and assign problems from the buffer
+        (in the order of the scheduling policy).
+
+        Each assignment (finding an available solver, dequeuing the problem & saving the
+        pending request) is done atomically by the dispatcher.
+
+        If adaptive time limits are enabled, the time limit is calculated once for all
+        problems assigned in this call
         """
-        while (self._get_available_solver() is not None) and (
-            not self._problems_buffer.is_empty()
-        ):
-            buffered_problem = self._problems_buffer.dequeue()
-            problem = json.loads(buffered_problem)
-            self._logger.info(
-                f"Dequeued problem {problem['problemId']} from the buffer"
-            )
-            self._assign_problem_to_solver(problem)
+        time_limit = None
+        assignment = self._dispatcher.dispatch()
+        while assignment is not None:
+            solver_id, buffered_problem = assignment
+            if self._adaptive_time_limit and time_limit is None:
+                time_limit = self._get_time_limit()
+                if time_limit != self._time_limit:
+                    self._logger.info(
+                        f"Time limit of dispatched problems set to {time_limit}s"
+                    )
+                    self._time_limit = time_limit
+            self._request_manager.set_cached(solver_id, buffered_problem)
+            self._assign_problem_to_solver(solver_id, buffered_problem, time_limit)
+            assignment = self._dispatcher.dispatch()
 
     def run(self):
         """
@@ -176,91 +668,311 @@ class Orchestrator:
         flask_thread.daemon = True
         flask_thread.start()
 
-        # Initialize Kafka broker configuration
+        last_cache_check = datetime.now()
+        last_lease_check = datetime.now()
+        while True:
+            # Serve delivery callbacks of produced messages
+            self._producer.poll(0)
+
+            # Only the leader consumes messages - Standby replicas keep trying to acquire the lease
+            if not self._hold_leadership():
+                time.sleep(self._leader_lease_time / 10)
+                continue
+
+            # Periodically compare the in-memory state with Redis
+            if (
+                self._state_cache
+                and self._state_cache_check_interval > 0
+                and (datetime.now() - last_cache_check).total_seconds()
+                >= self._state_cache_check_interval
+            ):
+                last_cache_check = datetime.now()
+                self._check_state_cache()
+
+            # Release the solvers that stopped sending heartbeats
+            if (datetime.now() - last_lease_check).total_seconds() >= 1:
+                last_lease_check = datetime.now()
+                try:
+                    self._expire_solvers()
+                except Exception as e:
+                    self._logger.error(
+                        f"run: Exception occured on solver expiry: {str(e)}"
+                    )
+
+            try:
+                messages = self._consumer.consume(
+                    self._consume_batch_size, self._consume_timeout
+                )
+            except Exception as e:
+                self._logger.error(f"run: Exception occured on consumer: {str(e)}")
+                continue
+
+            if not messages:
+                continue
+
+            for msg in messages:
+                # The lease is checked (& renewed if due) before every message, so that a leader that
+                # lost the lease without noticing (e.g. paused for longer than the lease time) stops writing
+                if not self._hold_leadership():
+                    break
+                try:
+                    self._handle_message(msg)
+                except Exception as e:
+                    self._logger.error(f"run: Exception occured on consumer: {str(e)}")
+                    continue
+
+            # Leadership lost during the batch - The rest of it is consumed by the new leader
+            if not self._is_leader:
+                continue
+
+            try:
+                self._consumer.commit(asynchronous=True)
+            except Exception as e:
+                self._logger.error(f"run: Exception occured on commit: {str(e)}")
+
+            if self._dispatch_mode == "pull":
+                continue
+
+            try:
+                self._process_buffer()
+            except Exception as e:
+                self._logger.error(f"run: Exception occured on dispatch: {str(e)}")
+
+    def _expire_solvers(self):
+        """
+        Release the solvers whose lease expired & assign the problems moved back to the queue.
+
+        Skipped while the consumer has no partitions assigned (e.g. joining the consumer group after a failover),
+        since the heartbeats are not received in the meantime and the leases would expire for solvers that are alive
+        """
+        if not self._consumer_assigned:
+            return
+
+        expired = self._solver_registry.expire()
+        for solver_id in expired:
+            self._handle_solver_expiry(solver_id)
+        if expired and self._dispatch_mode != "pull":
+            self._process_buffer()
+
+    def _on_assign(self, consumer, partitions):
+        """
+        Consumer callback: Partitions assigned (joined the consumer group) - The leases of all solvers are
+        extended, so that the heartbeats sent while no consumer was receiving them (consumed from the committed
+        offsets onwards) can be caught up on before any lease expires
+
+        Keyword arguments:
+        - consumer -- the consumer
+        - partitions -- the assigned partitions
+        """
+        solvers = self._solver_registry.refresh()
+        self._consumer_assigned = True
+        self._logger.info(
+            f"Assigned {len(partitions)} partitions {time.monotonic() - self._leading_since:.2f}s after taking over"
+            f" - Leases of {solvers} solvers extended"
+        )
+
+    def _on_revoke(self, consumer, partitions):
+        """
+        Consumer callback: Partitions revoked or lost (e.g. rebalance) - The leases of the solvers
+        don't expire until partitions are assigned again
+
+        Keyword arguments:
+        - consumer -- the consumer
+        - partitions -- the revoked partitions
+        """
+        self._consumer_assigned = False
+        self._logger.warning(f"Revoked {len(partitions)} partitions")
+
+    def _hold_leadership(self):
+        """
+        Acquire or renew the leader lease (renewed 3 times per lease time), and start or
+        stop consuming messages when leadership is gained or lost.
+
+        Returns True if this replica is the leader, otherwise False
+        """
+        now = datetime.now()
+        if (
+            self._is_leader
+            and (now - self._last_lease_renewal).total_seconds()
+            < self._leader_lease_time / 3
+        ):
+            return True
+
+        try:
+            if self._is_leader:
+                leader = self._leader_lease.renew()
+            else:
+                leader = self._leader_lease.acquire()
+        except Exception as e:
+            self._logger.error(f"_hold_leadership: Exception occured: {str(e)}")
+            leader = False
+
+        if leader:
+            self._last_lease_renewal = now
+            if not self._is_leader:
+                self._is_leader = True
+                self._start_leading()
+        elif self._is_leader:
+            self._is_leader = False
+            self._logger.critical(
+                f"Replica {self._replica_id} lost the leader lease - Stopped consuming"
+            )
+            # The offsets are not committed, since the consumed messages may not have been handled
+            self._stop_consumer(commit=False)
+        return self._is_leader
+
+    def _start_leading(self):
+        """
+        Take over as the leader: Reload the state written by the previous leader, request the
+        status of the solvers & start consuming messages
+        """
+        self._leading_since = time.monotonic()
+        stats = self._leader_lease.get_stats()
+        self._logger.info(
+            f"Replica {self._replica_id} is the leader ({stats['failovers']} failovers so far)"
+        )
+
+        # Move the problems queued before the buffer was partitioned by model
+        unpartitioned_buffer = self._create_buffer(self._buffer_name)
+        problem_json = unpartitioned_buffer.dequeue()
+        while problem_json is not None:
+            self._problems_buffer.enqueue(problem_json)
+            problem_json = unpartitioned_buffer.dequeue()
+
+        if self._state_cache:
+            self._solver_manager.resync()
+            self._request_manager.resync()
+        self._idle_solvers.rebuild()
+        self._problems_buffer.get_partitions()
+
+        # No heartbeats were received since the previous leader stopped - The leases are extended
+        # & don't expire until the consumer joins the group (see _on_assign)
+        self._consumer_assigned = False
+        self._solver_registry.refresh()
+
+        if self._dispatch_mode != "pull":
+            # Send messages to all solvers to find their status
+            for solver_id in range(self._solvers):
+                self._send_message(
+                    f"problem-execute-req-{solver_id+1}",
+                    {"problemId": None},
+                )
+
+        # Single consumer for all topics - Messages are consumed in batches and the offsets
+        # are committed once per batch
         topics = [
             "problem-execute-req",
             "problem-execute-res",
             "problem-result",
             "problem-deleted",
+            "solver-heartbeat",
         ]
         broker_config = {
             "bootstrap.servers": self._broker_uri,
             "group.id": self._app_id,
             "auto.offset.reset": "earliest",
             "enable.auto.commit": False,
+            "session.timeout.ms": int(self._consumer_session_timeout * 1000),
         }
+        self._consumer = Consumer(broker_config)
+        self._consumer.subscribe(
+            topics,
+            on_assign=self._on_assign,
+            on_revoke=self._on_revoke,
+            on_lost=self._on_revoke,
+        )
 
-        self._consumers = [Consumer(broker_config) for _ in topics]
-        for index in range(len(topics)):
-            self._consumers[index].subscribe([topics[index]])
+    def _stop_consumer(self, commit=True):
+        """
+        Commit the consumed offsets & close the consumer
 
-        while True:
-            for consumer in self._consumers:
-                try:
-                    msg = consumer.poll(0.2)
-                    if msg is None:
-                        continue
-                    if msg.error():
-                        self._logger.error(f"run: Kafka Error: {msg}")
-                        if msg.error().code() == KafkaError._PARTITION_EOF:
-                            # End of partition, exit consumer loop
-                            self._logger.critical(
-                                "run: Kafka end of partition - Exiting loop"
-                            )
-                            break
-                        else:
-                            continue
-
-                    # Get message's topic to decide next action
-                    topic = msg.topic()
-                    self._logger.debug(f"Received message on topic {topic}")
-
-                    # Decode the incoming JSON message - In case of erroneous values, ignore
-                    problem_data = None
-                    try:
-                        problem_data = json.loads(msg.value().decode("utf-8"))
-                        if problem_data is None:
-                            consumer.commit(msg)
-                            continue
-                    except Exception as e:
-                        consumer.commit(msg)
-                        self._logger.error(
-                            f"run: Error occured on received problem: {e}"
-                        )
-                        continue
-
-                    # Handle the received message depending on the topic value
-                    if topic == "problem-execute-req":
-                        self._handle_incoming_request(problem_data)
-                    elif topic == "problem-execute-res":
-                        self._handle_solver_response(problem_data)
-                    elif topic == "problem-result":
-                        self._handle_solver_result(problem_data)
-                    elif topic == "problem-deleted":
-                        self._handle_problem_deletion(problem_data)
-
-                    consumer.commit(msg)
-                    self._process_buffer()
-                except Exception as e:
-                    self._logger.error(f"run: Exception occured on consumer: {str(e)}")
-                    continue
+        Keyword arguments:
+        - commit -- whether to commit the consumed offsets (default True)
+        """
+        if self._consumer is None:
+            return
+        if commit:
+            try:
+                self._consumer.commit(asynchronous=False)
+            except:
+                pass
+        self._consumer.close()
+        self._consumer = None
+        self._consumer_assigned = False
+
+    def _check_state_cache(self):
+        """
+        Compare the in-memory copy of solvers' status & requests with Redis,
+        and resync in case of differences
+        """
+        for manager in [self._solver_manager, self._request_manager]:
+            try:
+                mismatches = manager.check_consistency()
+                if mismatches:
+                    self._logger.warning(
+                        f"State cache differs from Redis for solvers {mismatches} - Resyncing"
+                    )
+                    manager.resync()
+            except Exception as e:
+                self._logger.error(f"_check_state_cache: Exception occured: {str(e)}")
 
-    def _send_message(self, topic: str, message: any):
+    def _handle_message(self, msg):
         """
-        Produce a message to Kafka broker
+        Handle a single message consumed from the broker, depending on its topic
+
+        Keyword arguments:
+        - msg -- the consumed Kafka message
+        """
+        if msg.error():
+            self._logger.error(f"run: Kafka Error: {msg}")
+            if msg.error().code() == KafkaError._PARTITION_EOF:
+                # End of partition
+                self._logger.critical("run: Kafka end of partition")
+            return
+
+        # Get message's topic to decide next action
+        topic = msg.topic()
+        self._logger.debug(f"Received message on topic {topic}")
+
+        # Decode the incoming JSON message - In case of erroneous values, ignore
+        problem_data = None
+        try:
+            problem_data = json.loads(msg.value().decode("utf-8"))
+            if problem_data is None:
+                return
+        except Exception as e:
+            self._logger.error(f"run: Error occured on received problem: {e}")
+            return
+
+        # Handle the received message depending on the topic value
+        if topic == "problem-execute-req":
+            self._handle_incoming_request(problem_data)
+        elif topic == "problem-execute-res":
+            self._handle_solver_response(problem_data)
+        elif topic == "problem-result":
+            self._handle_solver_result(problem_data)
+        elif topic == "problem-deleted":
+            self._handle_problem_deletion(problem_data)
+        elif topic == "solver-heartbeat":
+            self._handle_solver_heartbeat(problem_data)
+
+    def _send_message(self, topic: str, message: any, key: str = None):
+        """
+        Produce a message to Kafka broker.
+
+        Delivery is asynchronous - The delivery callback is served on a later poll of the producer
 
         Keyword arguments:
         - topic -- the topic name where the message should be sent
         - message -- any object (dict, array etc.) that will be sent to the broker (will be turned to JSON before sending)
+        - key -- if given, the key of the message, which decides its partition (default None)
         """
-        # Initialize Kafka broker configuration
-        broker_config = {"bootstrap.servers": self._broker_uri}
-        producer = Producer(broker_config)
         data = json.dumps(message)
 
-        producer.produce(
+        self._producer.produce(
             topic,
             data,
+            key=key,
             callback=lambda err, msg: (
                 self._logger.error(
                     f"_send_message: Producer Error: {err} (Topic: {topic}, Data: {data})"
@@ -269,17 +981,102 @@ class Orchestrator:
                 else self._logger.debug(f"Message Delivered (Topic: {topic})")
             ),
         )
-        producer.poll(0)
-        producer.flush()
+        self._producer.poll(0)
+
+    def _get_problem_state(self, problem_id):
+        """
+        Read the current state of a problem with a single round trip to Redis
+        (the solvers' status & requests are read from memory if cached).
+
+        Returns a tuple with:
+        - whether the problem is marked as deleted
+        - whether the problem exists in the queue (or is published on the work topic)
+        - all solvers along with their requests
+        - all solvers along with their status
+
+        Keyword arguments:
+        - problem_id -- the unique identifier of the problem
+        """
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.exists(f"problem:{problem_id}:deleted")
+        # The results are located by the number of commands queued before them
+        queued_index = len(pipeline)
+        if self._dispatch_mode == "pull":
+            pipeline.get(f"problem:{problem_id}:pending")
+        else:
+            self._problems_buffer.find(problem_id, pipeline)
+        requests_index = len(pipeline)
+        if not self._state_cache:
+            self._request_manager.get_solvers(pipeline)
+            statuses_index = len(pipeline)
+            self._solver_manager.get_solvers(pipeline)
+        results = pipeline.execute()
+
+        if self._state_cache:
+            requests = self._request_manager.get_solvers()
+            statuses = self._solver_manager.get_solvers()
+        else:
+            requests, statuses = results[requests_index], results[statuses_index]
+
+        return results[0] > 0, results[queued_index] is not None, requests, statuses
+
+    def _get_solver_state(self, solver_id):
+        """
+        Read the current status & request of a solver with a single round trip to Redis
+        (or from memory if cached).
+
+        Returns a tuple with the solver's status & request
+
+        Keyword arguments:
+        - solver_id -- the unique identifier of the solver
+        """
+        if self._state_cache:
+            return (
+                self._solver_manager.get_status(solver_id),
+                self._request_manager.get_request(solver_id),
+            )
+
+        pipeline = self._redis.pipeline(transaction=False)
+        self._solver_manager.get_status(solver_id, pipeline)
+        self._request_manager.get_request(solver_id, pipeline)
+        solver_status, solver_request = pipeline.execute()
+        return solver_status, solver_request
+
+    def _execute_pipeline(self, pipeline):
+        """
+        Execute a Redis pipeline with updates of solvers' status & requests - The in-memory
+        copy (if cached) is only updated once the pipeline succeeds.
+
+        Returns the results of the pipeline
+
+        Keyword arguments:
+        - pipeline -- the Redis pipeline to be executed
+        """
+        try:
+            results = pipeline.execute()
+        except:
+            # Commands of a failed transaction may still have been applied - Reload the in-memory copy
+            if self._state_cache:
+                try:
+                    self._solver_manager.resync()
+                    self._request_manager.resync()
+                except Exception as e:
+                    self._logger.error(
+                        f"_execute_pipeline: Exception occured: {str(e)}"
+                    )
+            raise
+        self._solver_manager.commit_cached(pipeline)
+        self._request_manager.commit_cached(pipeline)
+        return results
 
     def _handle_incoming_request(self, problem):
         """
         Handle an incoming problem execution request received from the broker.
 
-        First, check if there are already problems waiting in the queue.
+        Add the received problem to the queue (behind the problems that are already
+        waiting) and assign as many problems as possible to the available solvers.
 
-        Then try to assign the received problem to a solver, or add it to the
-        queue if all solvers are busy.
+        In pull mode, the problem is published on the work topic instead.
 
         Keyword arguments:
         - problem -- the problem submission as a dict, including the problem's ID,
@@ -289,43 +1086,90 @@ class Orchestrator:
         if problem_id is None:
             return
 
+        deleted, queued, requests, statuses = self._get_problem_state(problem_id)
+
         # Ignore the incoming request if problem is marked as deleted
-        if self._redis.get(f"problem:{problem_id}:deleted") is not None:
+        if deleted:
             self._logger.warning(
                 f"Received request for problem {problem_id} which is marked as deleted"
             )
             return
 
         # Ignore the incoming request if problem already exists in the queue
-        if self._problems_buffer.find(problem_id) is not None:
+        if queued:
             self._logger.warning(
                 f"Received request for problem {problem_id} which already exists in the queue"
             )
             return
 
         # Ignore the incoming request if problem already exists in a request
-        solvers = self._request_manager.get_solvers()
-        for solver_id, _ in solvers.items():
-            if self._request_manager.is_equal(solver_id, problem_id):
-                self._logger.warning(
-                    f"Received request for problem {problem_id} which is already sent towards solver {solver_id}"
-                )
-                return
+        solver_id = self._request_manager.find_solver(problem_id, requests)
+        if solver_id is not None:
+            self._logger.warning(
+                f"Received request for problem {problem_id} which is already sent towards solver {solver_id}"
+            )
+            return
 
         # Ignore the incoming request if problem is already running on a solver
-        solvers = self._solver_manager.get_solvers()
-        for solver_id, _ in solvers.items():
-            if self._solver_manager.is_equal(solver_id, problem_id):
-                self._logger.warning(
-                    f"Received request for problem {problem_id} which is already running on solver {solver_id}"
+        solver_id = self._solver_manager.find_solver(problem_id, statuses)
+        if solver_id is not None:
+            self._logger.warning(
+                f"Received request for problem {problem_id} which is already running on solver {solver_id}"
+            )
+            return
+
+        # Answer with the cached result if an identical submission was already executed - Marked as 'cached'
+        # (without solver), so that the user is not charged again for the same execution
+        if self._result_cache_enabled:
+            content_hash = ResultCache.get_hash(problem)
+            cached = self._result_cache.get(content_hash)
+            if cached is not None:
+                self._logger.info(f"Found cached result for problem {problem_id}")
+                self._send_message(
+                    "problem-result",
+                    {
+                        "problemId": problem_id,
+                        "executionTime": cached["executionTime"],
+                        "result": cached["result"],
+                        "cached": True,
+                    },
                 )
                 return
 
-        # Give priority to problems in the queue
-        if not self._problems_buffer.is_empty():
-            self._process_buffer()
+        # Save the submission & add to the queue - Problems already waiting in the queue are assigned first
+        pipeline = self._redis.pipeline()
+        if self._dispatch_mode != "pull":
+            self._problem_store.save(problem_id, problem, pipeline)
+        if self._result_cache_enabled:
+            pipeline.set(
+                f"problem:{problem_id}:hash",
+                content_hash,
+                ex=self._payload_retention_time or None,
+            )
+        attributes = self._get_attributes(problem)
+        if attributes["deadline"] is not None:
+            pipeline.set(
+                f"problem:{problem_id}:deadline",
+                attributes["deadline"],
+                ex=self._payload_retention_time or None,
+            )
+
+        # Pull mode - Publish the submission on the work topic & keep track of it until its result arrives
+        if self._dispatch_mode == "pull":
+            pipeline.set(
+                f"problem:{problem_id}:pending",
+                1,
+                ex=self._payload_retention_time or None,
+            )
+            pipeline.execute()
+            self._send_message(WORK_TOPIC, problem, key=problem_id)
+            self._logger.info(f"Published problem {problem_id} on the work topic")
+            return
 
-        self._assign_problem_to_solver(problem)
+        self._problems_buffer.enqueue(json.dumps(attributes), pipeline=pipeline)
+        pipeline.execute()
+        self._logger.info(f"Added problem {problem_id} to queue")
+        self._process_buffer()
 
     def _handle_solver_response(self, problem):
         """
@@ -347,10 +1191,14 @@ class Orchestrator:
         if solver_id is None:
             return
 
+        solver_status, solver_request = self._get_solver_state(solver_id)
+
+        # All updates are sent to Redis in a single transaction
+        pipeline = self._redis.pipeline()
+
         # Response 1 - Ready to accept a new submission (not busy)
         if problem_id is None:
             # Discard previously known status
-            solver_status = self._solver_manager.get_status(solver_id)
             if solver_status is not None and solver_status != EMPTY:
                 if self._redis.get(f"problem:{solver_status}:deleted") is not None:
                     self._logger.info(
@@ -360,31 +1208,33 @@ class Orchestrator:
                     self._logger.warning(
                         f"Discarded problem {solver_status} from solver {solver_id}"
                     )
+                    pipeline.delete(f"problem:{solver_status}:pending")
                     self._send_message(
                         "problem-execute-resend", {"problemId": solver_status}
                     )
-            self._solver_manager.update_status(solver_id, EMPTY)
+            self._solver_manager.update_status(solver_id, EMPTY, pipeline)
 
             # Move pending submissions towards this solver back to the buffer
-            solver_request = self._request_manager.get_request(solver_id)
             if solver_request is not None and solver_request != EMPTY:
-                self._request_manager.update_request(solver_id, EMPTY)
-                self._problems_buffer.enqueue(solver_request, True)
+                self._request_manager.update_request(solver_id, EMPTY, pipeline)
+                self._problems_buffer.enqueue(solver_request, True, pipeline)
 
+            self._execute_pipeline(pipeline)
             return
 
         error_msg = problem.get("error")
         if error_msg is not None:
             # Response 2 - Error occured on given problem_id : Set status of the solver to available
 
-            self._solver_manager.update_status(solver_id, EMPTY)
+            self._solver_manager.update_status(solver_id, EMPTY, pipeline)
+            self._problem_store.delete(problem_id, pipeline)
+            pipeline.delete(f"problem:{problem_id}:pending")
         else:
             # Response 3 - Notify that it's running problem with ID = problem_id
 
             # Discard previously known status
-            solver_status = self._solver_manager.get_status(solver_id)
             if (
-                not self._solver_manager.is_equal(solver_id, problem_id)
+                solver_status != problem_id
                 and solver_status is not None
                 and solver_status != EMPTY
             ):
@@ -393,6 +1243,7 @@ class Orchestrator:
                         f"Deleted problem {solver_status} was removed from solver {solver_id}"
                     )
                 else:
+                    pipeline.delete(f"problem:{solver_status}:pending")
                     self._send_message(
                         "problem-execute-resend", {"problemId": solver_status}
                     )
@@ -407,23 +1258,112 @@ class Orchestrator:
                 self._logger.info(
                     f"Problem {problem_id} is running on solver {solver_id}"
                 )
-                self._solver_manager.update_status(solver_id, problem_id)
+                self._solver_manager.update_status(solver_id, problem_id, pipeline)
 
         # Common logic for Response 2 & Response 3
 
         # Delete the problem from the buffer (if it exists)
-        if self._problems_buffer.find(problem_id) is not None:
-            self._problems_buffer.delete(problem_id)
+        self._problems_buffer.delete(problem_id, pipeline)
 
         # Clean-up the request - If the request doesn't match the response, move it back to the queue
-        solver_request = self._request_manager.get_request(solver_id)
         if (
             solver_request is not None
             and solver_request != EMPTY
-            and not self._request_manager.is_equal(solver_id, problem_id)
+            and not self._problem_equals_id(solver_request, problem_id)
         ):
-            self._problems_buffer.enqueue(solver_request, True)
-        self._request_manager.update_request(solver_id, EMPTY)
+            self._problems_buffer.enqueue(solver_request, True, pipeline)
+        self._request_manager.update_request(solver_id, EMPTY, pipeline)
+
+        self._execute_pipeline(pipeline)
+
+    def _handle_solver_heartbeat(self, heartbeat):
+        """
+        Handle a heartbeat received from a solver instance, by renewing the leases of its slots.
+
+        Slots that are not registered (new solvers, or solvers whose lease had expired) are
+        registered and their reported status is handled as a solver response
+
+        Keyword arguments:
+        - heartbeat -- the heartbeat as a dict, including the solver's ID, the problem executed on
+        each of its slots, the supported models & the number of slots
+        """
+        slots = heartbeat.get("slots") or []
+        info = {
+            "instance": heartbeat.get("solverId"),
+            "models": heartbeat.get("models") or [],
+            "capacity": heartbeat.get("capacity", len(slots)),
+            "resources": heartbeat.get("resources") or {},
+        }
+        registered, changed = self._solver_registry.renew(
+            {str(slot["solverId"]): info for slot in slots if "solverId" in slot}
+        )
+
+        # Solvers that are idle have to be found in the idle sets of the models they serve now
+        for solver_id in changed:
+            self._logger.info(f"Solver {solver_id} serves models {info['models']}")
+            self._idle_solvers.refresh(solver_id)
+
+        for slot in slots:
+            if str(slot.get("solverId")) in registered:
+                self._logger.info(f"Solver {slot['solverId']} registered")
+                self._handle_solver_response(
+                    {"problemId": slot.get("problemId"), "solverId": slot["solverId"]}
+                )
+
+    def _handle_solver_expiry(self, solver_id):
+        """
+        Handle a solver whose lease expired (no heartbeat received within the lease time).
+
+        The problem running on the solver & any pending submission towards it are moved
+        back to the front of the queue, and the solver is removed
+
+        Keyword arguments:
+        - solver_id -- the unique identifier of the solver
+        """
+        self._logger.warning(f"Lease of solver {solver_id} expired - Removing solver")
+
+        solver_status, solver_request = self._get_solver_state(solver_id)
+
+        # All updates are sent to Redis in a single transaction
+        pipeline = self._redis.pipeline()
+
+        # Move the problem running on the solver back to the queue - If its submission is not
+        # available (always the case in pull mode), the problem is requested again
+        if solver_status is not None and solver_status != EMPTY:
+            problem = None
+            if self._dispatch_mode != "pull":
+                problem = self._problem_store.load(solver_status)
+            if self._redis.get(f"problem:{solver_status}:deleted") is not None:
+                self._logger.info(
+                    f"Deleted problem {solver_status} was removed from solver {solver_id}"
+                )
+            elif problem is not None:
+                attributes = self._get_attributes(problem)
+                deadline = self._redis.get(f"problem:{solver_status}:deadline")
+                if deadline is not None:
+                    attributes["deadline"] = float(deadline)
+                self._problems_buffer.enqueue(json.dumps(attributes), True, pipeline)
+                self._logger.warning(
+                    f"Moved problem {solver_status} from solver {solver_id} back to the queue"
+                )
+            else:
+                pipeline.delete(f"problem:{solver_status}:pending")
+                self._send_message(
+                    "problem-execute-resend", {"problemId": solver_status}
+                )
+                self._logger.warning(
+                    f"Discarded problem {solver_status} from solver {solver_id}"
+                )
+
+        # Move pending submissions towards this solver back to the buffer
+        if solver_request is not None and solver_request != EMPTY:
+            self._problems_buffer.enqueue(solver_request, True, pipeline)
+
+        self._solver_manager.remove_solver(solver_id, pipeline)
+        self._request_manager.remove_solver(solver_id, pipeline)
+        self._idle_solvers.remove(solver_id, pipeline)
+
+        self._execute_pipeline(pipeline)
 
     def _handle_solver_result(self, problem):
         """
@@ -445,14 +1385,17 @@ class Orchestrator:
         if problem_id is None or solver_id is None:
             return
 
+        solver_status, solver_request = self._get_solver_state(solver_id)
+
+        # All updates are sent to Redis in a single transaction
+        pipeline = self._redis.pipeline()
+
         # Delete the problem from the buffer (if it exists)
-        if self._problems_buffer.find(problem_id) is not None:
-            self._problems_buffer.delete(problem_id)
+        self._problems_buffer.delete(problem_id, pipeline)
 
         # Discard previously known status
-        solver_status = self._solver_manager.get_status(solver_id)
         if (
-            not self._solver_manager.is_equal(solver_id, problem_id)
+            solver_status != problem_id
             and solver_status is not None
             and solver_status != EMPTY
         ):
@@ -461,6 +1404,7 @@ class Orchestrator:
                     f"Deleted problem {solver_status} was removed from solver {solver_id}"
                 )
             else:
+                pipeline.delete(f"problem:{solver_status}:pending")
                 self._send_message(
                     "problem-execute-resend", {"problemId": solver_status}
                 )
@@ -471,21 +1415,52 @@ class Orchestrator:
         self._logger.info(
             f"Problem {problem_id} execution finished on solver {solver_id}"
         )
-        self._solver_manager.update_status(solver_id, EMPTY)
-        self._redis.set(
+
+        execution_time = problem.get("executionTime")
+        if isinstance(execution_time, (int, float)):
+            self._recent_execution_times.append(execution_time)
+
+        content_hash, deadline = self._redis.mget(
+            f"problem:{problem_id}:hash", f"problem:{problem_id}:deadline"
+        )
+
+        # Record whether the problem was executed within its deadline
+        if deadline is not None:
+            met = datetime.now().timestamp() <= float(deadline)
+            pipeline.incr("deadlines:met" if met else "deadlines:missed")
+            if not met:
+                self._logger.warning(
+                    f"Problem {problem_id} missed its deadline by {datetime.now().timestamp() - float(deadline):.1f}s"
+                )
+        pipeline.delete(f"problem:{problem_id}:deadline")
+
+        # Save the result for identical submissions (unless the execution was cut short by the time limit)
+        if self._result_cache_enabled and (
+            self._result_cache_time_limited or not problem.get("timeLimitReached")
+        ):
+            result = problem.get("result")
+            if content_hash is not None and result is not None:
+                self._result_cache.put(
+                    content_hash, problem.get("executionTime"), result
+                )
+        pipeline.delete(f"problem:{problem_id}:hash", f"problem:{problem_id}:pending")
+        self._solver_manager.update_status(solver_id, EMPTY, pipeline)
+        pipeline.set(
             f"problem:{problem_id}:executed", 1, ex=self._executed_retention_time
         )
+        self._problem_store.delete(problem_id, pipeline)
 
         # Clean-up the request - If the request doesn't match the response, move it back to the queue
-        solver_request = self._request_manager.get_request(solver_id)
         if (
             solver_request is not None
             and solver_request != EMPTY
-            and not self._request_manager.is_equal(solver_id, problem_id)
+            and not self._problem_equals_id(solver_request, problem_id)
         ):
-            self._problems_buffer.enqueue(solver_request, True)
+            self._problems_buffer.enqueue(solver_request, True, pipeline)
+
+        self._request_manager.update_request(solver_id, EMPTY, pipeline)
 
-        self._request_manager.update_request(solver_id, EMPTY)
+        self._execute_pipeline(pipeline)
 
     def _handle_problem_deletion(self, problem):
         """
@@ -503,24 +1478,42 @@ class Orchestrator:
             return
 
         self._logger.debug(f"Received request to delete problem {problem_id}")
-        self._redis.set(
+
+        # Mark as deleted & delete problem from the queue & the store in a single transaction
+        pipeline = self._redis.pipeline()
+        pipeline.set(
             f"problem:{problem_id}:deleted", 1, ex=self._deletions_retention_time
         )
-
-        # Delete problem from the queue
-        if self._problems_buffer.find(problem_id):
-            self._problems_buffer.delete(problem_id)
+        self._problem_store.delete(problem_id, pipeline)
+        pipeline.delete(f"problem:{problem_id}:pending")
+        # The results are located by the number of commands queued before them
+        requests_index = len(pipeline)
+        if not self._state_cache:
+            self._request_manager.get_solvers(pipeline)
+        # Deleted from the queue of each model (one result per model)
+        buffer_index = len(pipeline)
+        self._problems_buffer.delete(problem_id, pipeline)
+        results = pipeline.execute()
+
+        if 1 in results[buffer_index:]:
             self._logger.info(f"Deleted problem {problem_id} from the queue")
 
         # Delete problem from any pending submission requests
-        solvers = self._request_manager.get_solvers()
-        for solver_id, _ in solvers.items():
+        if self._state_cache:
+            solvers = self._request_manager.get_solvers()
+        else:
+            solvers = results[requests_index]
+
+        pipeline = self._redis.pipeline()
+        for solver_id, solver_request in solvers.items():
             # Request found that matches the problem to be deleted
-            if self._request_manager.is_equal(solver_id, problem_id):
-                self._request_manager.update_request(solver_id, EMPTY)
+            if self._problem_equals_id(solver_request, problem_id):
+                self._request_manager.update_request(solver_id, EMPTY, pipeline)
                 self._logger.info(
                     f"Deleted request for problem {problem_id} towards solver {solver_id}"
                 )
+        if len(pipeline) > 0:
+            self._execute_pipeline(pipeline)
 
     def _check_kafka_status(self):
         """
@@ -529,11 +1522,8 @@ class Orchestrator:
         Returns True if connection is ok, otherwise False
         """
         try:
-            broker_config = {"bootstrap.servers": self._broker_uri}
-            producer = Producer(broker_config)
-
             # Try listing topics
-            metadata = producer.list_topics(timeout=5)
+            metadata = self._producer.list_topics(timeout=5)
             if metadata.topics:
                 return True
             else:
@@ -648,6 +1638,103 @@ class Orchestrator:
                 solvers_status = sorted(solvers_status, key=lambda x: x["name"])
                 components.extend(solvers_status)
 
+                leader = self._leader_lease.get_stats()
+                failover = (
+                    f", last took {leader['failoverTime']:.2f}s"
+                    if leader["failoverTime"] is not None
+                    else EMPTY
+                )
+                components.append(
+                    {
+                        "name": "Leader",
+                        "status": f"{leader['holder']} ({leader['failovers']} failovers{failover}) - {self._replica_id} is {'leader' if self._is_leader else 'standby'}",
+                    }
+                )
+
+                registered = self._solver_registry.get_solvers()
+                instances = {info["instance"] for info in registered.values()}
+                components.append(
+                    {
+                        "name": "Solver Registry",
+                        "status": f"{len(registered)} solvers on {len(instances)} instances (lease {self._solver_lease_time:g}s)",
+                    }
+                )
+
+                # Waiting problems & registered solvers (along with their resources) for each model
+                models = []
+                for model_id, buffer in self._problems_buffer.get_partitions().items():
+                    serving = [
+                        info
+                        for info in registered.values()
+                        if model_id in info["models"]
+                    ]
+                    # Resources are shared by the slots of each instance
+                    resources = {
+                        info["instance"]: info.get("resources", {}) for info in serving
+                    }.values()
+                    cores = sum(resource.get("cores", 0) for resource in resources)
+                    memory = sum(resource.get("memory", 0) for resource in resources)
+                    models.append(
+                        {
+                            "name": f"Model {model_id or 'unknown'}",
+                            "status": f"{buffer.get_length()} waiting, {len(serving)} solvers ({cores} cores, {memory} MB)",
+                        }
+                    )
+                components.extend(sorted(models, key=lambda x: x["name"]))
+
+                mean_wait = (
+                    self._queue_wait_time / self._queue_wait_count
+                    if self._queue_wait_count > 0
+                    else 0
+                )
+                components.append(
+                    {
+                        "name": "Scheduling",
+                        "status": f"{self._scheduling_policy}, mean queue wait {mean_wait:.3f}s over {self._queue_wait_count} problems",
+                    }
+                )
+
+                if self._adaptive_time_limit:
+                    components.append(
+                        {
+                            "name": "Time Limit",
+                            "status": f"{self._time_limit}s ({self._adaptive_time_limit_floor}s - {self._adaptive_time_limit_ceiling}s)",
+                        }
+                    )
+
+                met, missed = self._redis.mget("deadlines:met", "deadlines:missed")
+                components.append(
+                    {
+                        "name": "Deadlines",
+                        "status": f"{int(met or 0)} met, {int(missed or 0)} missed",
+                    }
+                )
+
+                # Waiting problems & waiting time of the oldest problem for each user
+                if self._scheduling_policy == "fair":
+                    queues = []
+                    for user_id, queue in self._problems_buffer.get_queues().items():
+                        depth, first = queue
+                        waiting = (
+                            current_time.timestamp() - json.loads(first)["queuedAt"]
+                        )
+                        queues.append(
+                            {
+                                "name": f"Queue {user_id or 'anonymous'}",
+                                "status": f"{depth} waiting, oldest for {waiting:.0f}s (weight {self._problems_buffer.get_weight(user_id)})",
+                            }
+                        )
+                    components.extend(sorted(queues, key=lambda x: x["name"]))
+
+                if self._result_cache_enabled:
+                    cache_stats = self._result_cache.get_stats()
+                    components.append(
+                        {
+                            "name": "Result Cache",
+                            "status": f"{cache_stats['hits']} hits, {cache_stats['misses']} misses, {cache_stats['entries']} entries",
+                        }
+                    )
+
                 response["uptime"] = uptime
                 response["components"] = components
 
@@ -658,11 +1745,13 @@ class Orchestrator:
 
     def __del__(self):
         """
-        Destructor: Close the consumer
+        Destructor: Commit the consumed offsets, close the consumer, deliver pending messages & release the leader lease
         """
         self._logger.critical("Shutting down...")
-        for consumer in self._consumers:
-            consumer.close()
+        self._producer.flush(self._producer_flush_timeout)
+        self._stop_consumer()
+        if self._is_leader:
+            self._leader_lease.release()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+import json
+import zlib
+import base64
+
+import redis
+
+COMPRESSED_PREFIX = "z:"
+
+
+class ProblemStore:
+    """
+    Stores the full problem submissions (payloads, including the input data) in Redis,
+    keyed by the problem's ID, so that queues & requests only need to hold the ID
+    """
+
+    def __init__(self, prefix, host, port, ttl=0, compress=False, connection_pool=None):
+        """
+        Keyword arguments:
+        - prefix -- the prefix of the keys, e.g. "problem" for keys "problem:{id}:payload"
+        - host -- host name or IP of Redis
+        - port -- connection port of Redis
+        - ttl -- how long (in seconds) should the payloads be retained for (default 0 - no expiration)
+        - compress -- if True, payloads are stored compressed (default False)
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
+        """
+        self._prefix = prefix
+        self._ttl = ttl
+        self._compress = compress
+
+        # Initialize Redis connection
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+    def _get_key(self, problem_id):
+        """
+        Get the Redis key of a problem's payload
+
+        Keyword arguments:
+        - problem_id -- the unique identifier of the problem
+        """
+        return f"{self._prefix}:{problem_id}:payload"
+
+    def save(self, problem_id, problem, pipeline=None):
+        """
+        Save the payload of a problem
+
+        Keyword arguments:
+        - problem_id -- the unique identifier of the problem
+        - problem -- the problem submission as a dict
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        data = json.dumps(problem)
+        if self._compress:
+            compressed = zlib.compress(data.encode("utf-8"))
+            data = COMPRESSED_PREFIX + base64.b64encode(compressed).decode("ascii")
+
+        client = self._redis if pipeline is None else pipeline
+        client.set(
+            self._get_key(problem_id), data, ex=self._ttl if self._ttl > 0 else None
+        )
+
+    def load(self, problem_id):
+        """
+        Load the payload of a problem.
+
+        Returns the problem submission as a dict, or None if not found (or expired)
+
+        Keyword arguments:
+        - problem_id -- the unique identifier of the problem
+        """
+        data = self._redis.get(self._get_key(problem_id))
+        if data is None:
+            return None
+
+        # Payloads are decompressed based on their prefix, regardless of the current configuration
+        if data.startswith(COMPRESSED_PREFIX):
+            compressed = base64.b64decode(data[len(COMPRESSED_PREFIX) :])
+            data = zlib.decompress(compressed).decode("utf-8")
+        return json.loads(data)
+
+    def delete(self, problem_id, pipeline=None):
+        """
+        Delete the payload of a problem
+
+        Keyword arguments:
+        - problem_id -- the unique identifier of the problem
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        client = self._redis if pipeline is None else pipeline
+        client.delete(self._get_key(problem_id))
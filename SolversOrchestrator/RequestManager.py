@@ -1,3 +1,5 @@
+import weakref
+
 import redis
 
 
@@ -6,7 +8,16 @@ class RequestManager:
     Manages the active requests towards available solvers
     """
 
-    def __init__(self, name, host, port, compare=lambda x, y: x == y):
+    def __init__(
+        self,
+        name,
+        host,
+        port,
+        compare=lambda x, y: x == y,
+        idle_solvers=None,
+        cache=False,
+        connection_pool=None,
+    ):
         """
         Keyword arguments:
         - name -- the name of the buffer
@@ -14,36 +25,88 @@ class RequestManager:
         - port -- connection port of Redis
         - compare -- function to be used when comparing a value to an entry of the buffer - returns True if equal otherwise false,
         e.g. lambda entry, value : entry["id"] == value
+        - idle_solvers -- IdleSolvers set to be kept in sync on every update (default None)
+        - cache -- if True, keep an in-memory copy of all requests that is written through to Redis
+        and serves all reads - Redis is only read on resync (default False)
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
         """
         self._name = name
         self._compare = compare
+        self._idle_solvers = idle_solvers
+        self._cache = None
+        # Updates of the in-memory copy queued on pipelines, applied once each pipeline is executed
+        self._pending = weakref.WeakKeyDictionary()
 
         # Initialize Redis connection
-        self._redis = redis.Redis(host=host, port=port, decode_responses=True)
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+        if cache:
+            self.resync()
 
-    def update_request(self, solver_id, request):
+    def update_request(self, solver_id, request, pipeline=None):
         """
         Update the request of a solver
 
         Keyword arguments:
         - solver_id -- the unique identifier of the solver
         - request -- new request value to be updated
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
         """
-        self._redis.hset(self._name, solver_id, request)
+        if self._idle_solvers is not None:
+            self._idle_solvers.update(self._name, solver_id, request, pipeline)
+        else:
+            client = self._redis if pipeline is None else pipeline
+            client.hset(self._name, solver_id, request)
+
+        self._update_cached(solver_id, request, pipeline)
 
-    def get_request(self, solver_id):
+    def remove_solver(self, solver_id, pipeline=None):
+        """
+        Remove a solver along with its request
+
+        Keyword arguments:
+        - solver_id -- the unique identifier of the solver
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        client = self._redis if pipeline is None else pipeline
+        client.hdel(self._name, solver_id)
+
+        self._update_cached(solver_id, None, pipeline)
+
+    def get_request(self, solver_id, pipeline=None):
         """
         Get the current request of a solver
 
         Keyword arguments:
         - solver_id -- the unique identifier of the solver
+        - pipeline -- if given, the command is queued on this Redis pipeline (bypassing the
+        in-memory copy) and the result is returned by its execute() (default None)
         """
+        if pipeline is not None:
+            pipeline.hget(self._name, solver_id)
+            return None
+        if self._cache is not None:
+            return self._cache.get(str(solver_id))
         return self._redis.hget(self._name, solver_id)
 
-    def get_solvers(self):
+    def get_solvers(self, pipeline=None):
         """
         Get all solvers along with their requests
+
+        Keyword arguments:
+        - pipeline -- if given, the command is queued on this Redis pipeline (bypassing the
+        in-memory copy) and the result is returned by its execute() (default None)
         """
+        if pipeline is not None:
+            pipeline.hgetall(self._name)
+            return None
+        if self._cache is not None:
+            return dict(self._cache)
         return self._redis.hgetall(self._name)
 
     def is_equal(self, solver_id, value):
@@ -56,3 +119,93 @@ class RequestManager:
         """
         current_request = self.get_request(solver_id)
         return self._compare(current_request, value)
+
+    def find_solver(self, value, solvers=None):
+        """
+        Find the first solver whose stored request is equal to a value.
+
+        Returns the solver's ID, or None if not found
+
+        Keyword arguments:
+        - value -- the value to be checked if is equal to the request of each solver
+        - solvers -- the solvers along with their requests, as returned by get_solvers()
+        (default None - they are read by calling get_solvers())
+        """
+        if solvers is None:
+            solvers = self.get_solvers()
+
+        for solver_id, current_request in solvers.items():
+            if self._compare(current_request, value):
+                return solver_id
+        return None
+
+    def set_cached(self, solver_id, request):
+        """
+        Update the cached request of a solver, after it was written to Redis
+        by another component (e.g. a server-side script)
+
+        Keyword arguments:
+        - solver_id -- the unique identifier of the solver
+        - request -- the request value that was written
+        """
+        if self._cache is not None:
+            self._cache[str(solver_id)] = request
+
+    def commit_cached(self, pipeline):
+        """
+        Apply the updates of the in-memory copy that were queued on a pipeline,
+        once the pipeline was executed successfully - The updates of a pipeline that
+        failed are dropped along with it, so that the copy does not diverge from Redis
+
+        Keyword arguments:
+        - pipeline -- the executed Redis pipeline
+        """
+        for solver_id, request in self._pending.pop(pipeline, []):
+            if request is None:
+                self._cache.pop(solver_id, None)
+            else:
+                self._cache[solver_id] = request
+
+    def _update_cached(self, solver_id, request, pipeline=None):
+        """
+        Update the cached request of a solver - If the update was queued on a pipeline,
+        the copy is updated when the pipeline is executed (see commit_cached)
+
+        Keyword arguments:
+        - solver_id -- the unique identifier of the solver
+        - request -- the request value that was written (None if the solver was removed)
+        - pipeline -- the Redis pipeline the update was queued on (default None)
+        """
+        if self._cache is None:
+            return
+        if pipeline is not None:
+            self._pending.setdefault(pipeline, []).append((str(solver_id), request))
+        elif request is None:
+            self._cache.pop(str(solver_id), None)
+        else:
+            self._cache[str(solver_id)] = request
+
+    def resync(self):
+        """
+        Reload the in-memory copy of all requests from Redis
+        """
+        self._cache = self._redis.hgetall(self._name)
+        self._pending = weakref.WeakKeyDictionary()
+
+    def check_consistency(self):
+        """
+        Compare the in-memory copy of all requests with Redis.
+
+        Returns the IDs of the solvers whose cached request differs from Redis
+        (always empty if caching is disabled)
+        """
+        if self._cache is None:
+            return []
+
+        stored = self._redis.hgetall(self._name)
+        cached = dict(self._cache)
+        return [
+            solver_id
+            for solver_id in set(stored) | set(cached)
+            if stored.get(solver_id) != cached.get(solver_id)
+        ]
@@ -0,0 +1,170 @@
+import json
+import hashlib
+import time
+
+import redis
+
+# Save a result & evict the least recently used entries (and the expired ones) above the size limit
+# KEYS: prefix of entries, LRU sorted set
+# ARGV: hash, result, TTL, maximum entries, current time
+PUT_SCRIPT = """
+local ttl = tonumber(ARGV[3])
+local max_entries = tonumber(ARGV[4])
+local now = tonumber(ARGV[5])
+if ttl > 0 then
+    redis.call('SET', KEYS[1] .. ARGV[1], ARGV[2], 'EX', ttl)
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - ttl)
+else
+    redis.call('SET', KEYS[1] .. ARGV[1], ARGV[2])
+end
+redis.call('ZADD', KEYS[2], now, ARGV[1])
+if max_entries > 0 then
+    local overflow = redis.call('ZCARD', KEYS[2]) - max_entries
+    if overflow > 0 then
+        local evicted = redis.call('ZPOPMIN', KEYS[2], overflow)
+        for i = 1, #evicted, 2 do
+            redis.call('DEL', KEYS[1] .. evicted[i])
+        end
+    end
+end
+"""
+
+# Get a result & count the hit or miss - On a hit, the entry's TTL & its position in the LRU sorted set are
+# refreshed together, so that entries never expire while looking recently used
+# KEYS: entry, LRU sorted set, hits counter, misses counter
+# ARGV: hash, TTL, current time
+GET_SCRIPT = """
+local data = redis.call('GET', KEYS[1])
+if not data then
+    redis.call('INCR', KEYS[4])
+    redis.call('ZREM', KEYS[2], ARGV[1])
+    return nil
+end
+redis.call('INCR', KEYS[3])
+if tonumber(ARGV[2]) > 0 then
+    redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+redis.call('ZADD', KEYS[2], ARGV[3], ARGV[1])
+return data
+"""
+
+
+class ResultCache:
+    """
+    Caches the results of executed problems in Redis, keyed by a hash of the submission's
+    content (model, metadata & input data), so that identical submissions can be answered
+    without executing them again.
+
+    Entries expire after a TTL and the least recently used ones are evicted above a size limit
+    """
+
+    def __init__(self, name, host, port, ttl=0, max_entries=0, connection_pool=None):
+        """
+        Keyword arguments:
+        - name -- the name of the cache (prefix of its keys)
+        - host -- host name or IP of Redis
+        - port -- connection port of Redis
+        - ttl -- how long (in seconds) should the results be retained for (default 0 - no expiration)
+        - max_entries -- maximum number of cached results (default 0 - unlimited)
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
+        """
+        self._name = name
+        self._entries_prefix = f"{name}:entry:"
+        self._lru = f"{name}:lru"
+        self._hits = f"{name}:hits"
+        self._misses = f"{name}:misses"
+        self._ttl = ttl
+        self._max_entries = max_entries
+
+        # Initialize Redis connection
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+        self._get_script = self._redis.register_script(GET_SCRIPT)
+        self._put_script = self._redis.register_script(PUT_SCRIPT)
+
+    @staticmethod
+    def get_hash(problem):
+        """
+        Get the canonical hash of a problem submission's content.
+
+        Metadata & input data are normalized (if valid JSON) so that formatting differences
+        do not matter, and the description is ignored since it does not affect the result
+
+        Keyword arguments:
+        - problem -- the problem submission as a dict, including the problem's ID,
+        solver's ID, model, metadata & input data
+        """
+
+        def normalize(value):
+            try:
+                return json.loads(value) if isinstance(value, str) else value
+            except:
+                return value
+
+        metadata = normalize(problem.get("metadata"))
+        if isinstance(metadata, dict):
+            metadata = {k: v for k, v in metadata.items() if k != "Description"}
+
+        content = json.dumps(
+            [problem.get("modelId"), metadata, normalize(problem.get("inputData"))],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def get(self, content_hash):
+        """
+        Get a cached result & update the hit/miss counters - A hit refreshes the entry's TTL
+        along with its position in the LRU order.
+
+        Returns a dict with the 'executionTime' & 'result' of the execution, or None if not cached
+
+        Keyword arguments:
+        - content_hash -- the hash of the submission's content (see get_hash)
+        """
+        data = self._get_script(
+            keys=[
+                self._entries_prefix + content_hash,
+                self._lru,
+                self._hits,
+                self._misses,
+            ],
+            args=[content_hash, self._ttl, time.time()],
+        )
+
+        return json.loads(data) if data is not None else None
+
+    def put(self, content_hash, execution_time, result):
+        """
+        Save the result of an execution
+
+        Keyword arguments:
+        - content_hash -- the hash of the submission's content (see get_hash)
+        - execution_time -- the execution time (in seconds)
+        - result -- the result object, as a JSON string
+        """
+        data = json.dumps({"executionTime": execution_time, "result": result})
+        self._put_script(
+            keys=[self._entries_prefix, self._lru],
+            args=[content_hash, data, self._ttl, self._max_entries, time.time()],
+        )
+
+    def get_stats(self):
+        """
+        Get the hit & miss counters and the number of cached results
+        """
+        pipeline = self._redis.pipeline(transaction=False)
+        pipeline.get(self._hits)
+        pipeline.get(self._misses)
+        pipeline.zcard(self._lru)
+        hits, misses, entries = pipeline.execute()
+        return {
+            "hits": int(hits or 0),
+            "misses": int(misses or 0),
+            "entries": entries,
+        }
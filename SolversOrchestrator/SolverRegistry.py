@@ -0,0 +1,212 @@
+import json
+import time
+
+import redis
+
+# Lua fragment: Remove a solver ('solver_id') from the sets of solvers serving each of the models
+# in its info (KEYS[2]) - The set of each model is named "{prefix}{model}" (ARGV[1])
+UNREGISTER_MODELS_FRAGMENT = """
+local info = redis.call('HGET', KEYS[2], solver_id)
+if info then
+    for _, model in ipairs(cjson.decode(info)['models'] or {}) do
+        redis.call('SREM', ARGV[1] .. model, solver_id)
+    end
+end
+"""
+
+# Renew the lease of a solver & save its info, along with the models it serves
+# KEYS: leases, info
+# ARGV: prefix of model sets, solver, expiration time, info
+# Returns 1 if the solver was not registered, 2 if the models it serves changed, otherwise 0
+RENEW_SCRIPT = (
+    """
+local solver_id = ARGV[2]
+local models = cjson.decode(ARGV[4])['models'] or {}
+local previous = redis.call('HGET', KEYS[2], solver_id)
+local changed = previous and cjson.encode(cjson.decode(previous)['models'] or {}) ~= cjson.encode(models)
+"""
+    + UNREGISTER_MODELS_FRAGMENT
+    + """
+local added = redis.call('ZADD', KEYS[1], ARGV[3], solver_id)
+redis.call('HSET', KEYS[2], solver_id, ARGV[4])
+for _, model in ipairs(models) do
+    redis.call('SADD', ARGV[1] .. model, solver_id)
+end
+if added == 0 and changed then
+    return 2
+end
+return added
+"""
+)
+
+# Remove a solver from the leases (sorted set), its info (hash) & the models it serves
+# KEYS: leases, info
+# ARGV: prefix of model sets, solver
+REMOVE_SCRIPT = (
+    """
+local solver_id = ARGV[2]
+"""
+    + UNREGISTER_MODELS_FRAGMENT
+    + """
+redis.call('ZREM', KEYS[1], solver_id)
+redis.call('HDEL', KEYS[2], solver_id)
+"""
+)
+
+# Remove the solvers whose lease expired from the leases (sorted set), their info (hash) & the models they serve
+# KEYS: leases, info
+# ARGV: prefix of model sets, current time
+EXPIRE_SCRIPT = (
+    """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[2])
+for _, solver_id in ipairs(expired) do
+"""
+    + UNREGISTER_MODELS_FRAGMENT
+    + """
+    redis.call('ZREM', KEYS[1], solver_id)
+    redis.call('HDEL', KEYS[2], solver_id)
+end
+return expired
+"""
+)
+
+# Extend the leases of all solvers to the given expiration time
+# KEYS: leases
+# ARGV: expiration time
+REFRESH_SCRIPT = """
+local solvers = redis.call('ZRANGE', KEYS[1], 0, -1)
+for _, solver_id in ipairs(solvers) do
+    redis.call('ZADD', KEYS[1], ARGV[1], solver_id)
+end
+return #solvers
+"""
+
+
+class SolverRegistry:
+    """
+    Keeps track of the available solvers using Redis - Solvers announce themselves with periodic heartbeats,
+    and each heartbeat renews the solver's lease. Solvers whose lease expired (no heartbeat within the lease time)
+    are considered unavailable.
+
+    The leases are kept in a sorted set (solver -> expiration time), the info announced by each solver
+    (e.g. supported models, capacity & resources) in a hash next to it, and the solvers serving each model in a set per model
+    """
+
+    def __init__(self, name, host, port, lease_time=15, connection_pool=None):
+        """
+        Keyword arguments:
+        - name -- the name of the registry
+        - host -- host name or IP of Redis
+        - port -- connection port of Redis
+        - lease_time -- how long (in seconds) is a solver considered available after its last heartbeat (default 15)
+        - connection_pool -- Redis connection pool to be shared with other components - if given, host & port are ignored (default None)
+        """
+        self._name = name
+        self._leases = f"{name}:leases"
+        self._info = f"{name}:info"
+        self._models_prefix = f"{name}:models:"
+        self._lease_time = lease_time
+
+        # Initialize Redis connection
+        self._redis = redis.Redis(
+            host=host,
+            port=port,
+            decode_responses=True,
+            connection_pool=connection_pool,
+        )
+
+        self._renew_script = self._redis.register_script(RENEW_SCRIPT)
+        self._remove_script = self._redis.register_script(REMOVE_SCRIPT)
+        self._expire_script = self._redis.register_script(EXPIRE_SCRIPT)
+        self._refresh_script = self._redis.register_script(REFRESH_SCRIPT)
+
+    def get_info_key(self):
+        """
+        Get the Redis key of the solvers' info hash
+        """
+        return self._info
+
+    def get_model_key(self, model):
+        """
+        Get the Redis key of the set of solvers serving a model
+
+        Keyword arguments:
+        - model -- the unique identifier of the model
+        """
+        return f"{self._models_prefix}{model}"
+
+    def renew(self, solvers):
+        """
+        Renew the leases of solvers that sent a heartbeat (registering the ones that are not known).
+
+        Returns a tuple with the IDs of the newly registered solvers & the IDs of the registered
+        solvers whose models changed
+
+        Keyword arguments:
+        - solvers -- dict with the unique identifiers of the solvers as keys and their info as values,
+        including the models they serve ('models')
+        """
+        if not solvers:
+            return [], []
+
+        expires_at = time.time() + self._lease_time
+        pipeline = self._redis.pipeline()
+        for solver_id, info in solvers.items():
+            self._renew_script(
+                keys=[self._leases, self._info],
+                args=[self._models_prefix, solver_id, expires_at, json.dumps(info)],
+                client=pipeline,
+            )
+        results = pipeline.execute()
+
+        registered = [
+            solver_id for solver_id, result in zip(solvers, results) if result == 1
+        ]
+        changed = [
+            solver_id for solver_id, result in zip(solvers, results) if result == 2
+        ]
+        return registered, changed
+
+    def expire(self):
+        """
+        Remove the solvers whose lease expired.
+
+        Returns the IDs of the removed solvers
+        """
+        return self._expire_script(
+            keys=[self._leases, self._info], args=[self._models_prefix, time.time()]
+        )
+
+    def refresh(self):
+        """
+        Extend the leases of all registered solvers by the lease time, e.g. when the heartbeats
+        could not be received for a while (no consumer) and the solvers should not be considered unavailable.
+
+        Returns the number of registered solvers
+        """
+        return self._refresh_script(
+            keys=[self._leases], args=[time.time() + self._lease_time]
+        )
+
+    def remove(self, solver_id, pipeline=None):
+        """
+        Remove a solver from the registry
+
+        Keyword arguments:
+        - solver_id -- the unique identifier of the solver
+        - pipeline -- if given, the command is queued on this Redis pipeline instead of being executed (default None)
+        """
+        self._remove_script(
+            keys=[self._leases, self._info],
+            args=[self._models_prefix, solver_id],
+            client=pipeline,
+        )
+
+    def get_solvers(self):
+        """
+        Get all registered solvers along with the info they announced
+        """
+        return {
+            solver_id: json.loads(info)
+            for solver_id, info in self._redis.hgetall(self._info).items()
+        }
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+import fakeredis
+import redis
+
+# The modules of the orchestrator are imported by name, as in Orchestrator.py
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def redis_pool():
+    """
+    Redis connection pool on an in-memory server (with Lua scripting), shared by the components under test
+    """
+    return redis.ConnectionPool(
+        connection_class=fakeredis.FakeRedisConnection,
+        server=fakeredis.FakeServer(),
+        decode_responses=True,
+    )
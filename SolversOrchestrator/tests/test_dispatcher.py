@@ -0,0 +1,129 @@
+import json
+
+import pytest
+import redis
+
+from BufferFIFO import BufferFIFO
+from BufferPartitioned import BufferPartitioned
+from Dispatcher import Dispatcher
+from IdleSolvers import EMPTY, IdleSolvers
+from SolverRegistry import SolverRegistry
+from StatusManager import StatusManager
+
+
+@pytest.fixture
+def components(redis_pool):
+    """
+    Dispatcher of a FIFO buffer partitioned by model, along with the registry & status of the solvers
+    """
+    buffer = BufferPartitioned(
+        "buffer",
+        None,
+        None,
+        lambda value: json.loads(value)["modelId"],
+        lambda name: BufferFIFO(
+            name,
+            None,
+            None,
+            lambda value: json.loads(value)["problemId"],
+            connection_pool=redis_pool,
+        ),
+        connection_pool=redis_pool,
+    )
+    registry = SolverRegistry("registry", None, None, connection_pool=redis_pool)
+    idle_solvers = IdleSolvers(
+        "idle",
+        None,
+        None,
+        "status",
+        "requests",
+        registry.get_info_key(),
+        connection_pool=redis_pool,
+    )
+    status = StatusManager(
+        "status", None, None, idle_solvers=idle_solvers, connection_pool=redis_pool
+    )
+    dispatcher = Dispatcher(
+        None,
+        None,
+        buffer,
+        idle_solvers,
+        "requests",
+        registry,
+        connection_pool=redis_pool,
+    )
+    return buffer, registry, idle_solvers, status, dispatcher
+
+
+def enqueue(buffer, problem_id, model_id):
+    buffer.enqueue(json.dumps({"problemId": problem_id, "modelId": model_id}))
+
+
+def test_dispatch_to_solver_serving_model(components):
+    buffer, registry, idle_solvers, status, dispatcher = components
+    registry.renew({"1": {"models": ["vrp"]}, "2": {"models": ["knapsack"]}})
+    status.update_status("1", EMPTY)
+    status.update_status("2", EMPTY)
+
+    enqueue(buffer, "p1", "knapsack")
+    enqueue(buffer, "p2", "knapsack")
+
+    assert dispatcher.dispatch()[0] == "2"
+    assert dispatcher.dispatch() is None
+    assert idle_solvers.get_solvers() == {"1"}
+    assert buffer.get_length() == 1
+
+
+def test_dispatch_to_unregistered_solver(components):
+    buffer, registry, idle_solvers, status, dispatcher = components
+    status.update_status("1", EMPTY)
+
+    enqueue(buffer, "p1", "vrp")
+
+    assert dispatcher.dispatch()[0] == "1"
+    assert idle_solvers.get_solvers() == set()
+
+
+def test_dispatch_after_models_changed(components, redis_pool):
+    buffer, registry, idle_solvers, status, dispatcher = components
+    registry.renew({"1": {"models": ["vrp"]}})
+    status.update_status("1", EMPTY)
+
+    # The solver serves another model while idle
+    assert registry.renew({"1": {"models": ["knapsack"]}}) == ([], ["1"])
+    idle_solvers.refresh("1")
+
+    enqueue(buffer, "p1", "vrp")
+    assert dispatcher.dispatch() is None
+    assert not redis.Redis(connection_pool=redis_pool).exists("idle:model:vrp")
+
+    enqueue(buffer, "p2", "knapsack")
+    assert dispatcher.dispatch()[0] == "1"
+
+
+def test_solver_stays_idle_when_buffer_is_empty(components):
+    buffer, registry, idle_solvers, status, dispatcher = components
+    registry.renew({"1": {"models": ["vrp"]}})
+    status.update_status("1", EMPTY)
+
+    enqueue(buffer, "p1", "vrp")
+    assert dispatcher.dispatch()[0] == "1"
+    # Executed - The request is answered & the solver is free again
+    idle_solvers.update("requests", "1", EMPTY)
+    assert dispatcher.dispatch() is None
+
+    enqueue(buffer, "p2", "vrp")
+    assert dispatcher.dispatch()[0] == "1"
+
+
+def test_rebuild(components, redis_pool):
+    buffer, registry, idle_solvers, status, dispatcher = components
+    registry.renew({"1": {"models": ["vrp"]}})
+    status.update_status("1", EMPTY)
+    status.update_status("2", "p1")
+    client = redis.Redis(connection_pool=redis_pool)
+    client.sadd("idle:model:knapsack", "3")
+
+    assert idle_solvers.rebuild() == 1
+    assert client.smembers("idle:model:vrp") == {"1"}
+    assert not client.exists("idle:model:knapsack")
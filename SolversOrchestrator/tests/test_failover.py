@@ -0,0 +1,147 @@
+import json
+import os
+import shutil
+import time
+from datetime import timedelta
+from unittest import mock
+
+import pytest
+import redis
+
+import Orchestrator as orchestrator_module
+
+DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def create_orchestrator(redis_pool, tmp_path, monkeypatch):
+    """
+    Factory of orchestrator replicas sharing the same Redis, with the Kafka clients mocked
+    (configured by the .env of the orchestrator, logging to a temporary directory)
+    """
+    for file in [".env", "logger.ini"]:
+        shutil.copy(os.path.join(DIRECTORY, file), tmp_path)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(
+        orchestrator_module.redis, "ConnectionPool", lambda **_: redis_pool
+    )
+    monkeypatch.setattr(orchestrator_module, "Producer", lambda _: mock.MagicMock())
+    monkeypatch.setattr(orchestrator_module, "Consumer", lambda _: mock.MagicMock())
+
+    replicas = []
+
+    def create(replica_id):
+        monkeypatch.setenv("REPLICA_ID", replica_id)
+        replica = orchestrator_module.Orchestrator()
+        replicas.append(replica)
+        return replica
+
+    yield create
+
+    # Crashed replicas don't release the lease
+    for replica in replicas:
+        replica._is_leader = False
+
+
+def expire_leases(redis_pool):
+    """
+    Set the leases of all solvers as expired, as if no heartbeat was received for longer than the lease time
+    """
+    client = redis.Redis(connection_pool=redis_pool)
+    for solver_id in client.zrange("solver_registry:leases", 0, -1):
+        client.zadd("solver_registry:leases", {solver_id: time.time() - 1})
+
+
+def test_failover_keeps_running_problems(create_orchestrator, redis_pool):
+    leader = create_orchestrator("replica-1")
+    standby = create_orchestrator("replica-2")
+    assert leader._hold_leadership()
+    assert not standby._hold_leadership()
+    leader._on_assign(leader._consumer, [])
+
+    # A solver registers with a running problem
+    leader._handle_solver_heartbeat(
+        {"solverId": 1, "slots": [{"solverId": 1, "problemId": "p1"}], "models": []}
+    )
+    assert leader._solver_manager.get_status("1") == "p1"
+
+    # The leader crashes - Its lease & the leases of the solvers expire before the standby takes over
+    redis.Redis(connection_pool=redis_pool).delete("orchestrator_leader")
+    expire_leases(redis_pool)
+    assert standby._hold_leadership()
+
+    # No heartbeats are received while the standby joins the consumer group (longer than the lease time)
+    standby._expire_solvers()
+    expire_leases(redis_pool)
+    standby._expire_solvers()
+
+    # Joined the group - The heartbeats are caught up on within the extended lease
+    on_assign = standby._consumer.subscribe.call_args.kwargs["on_assign"]
+    on_assign(standby._consumer, [])
+    standby._expire_solvers()
+
+    assert standby._solver_manager.get_status("1") == "p1"
+    assert standby._solver_registry.get_solvers().keys() == {"1"}
+    assert standby._problems_buffer.get_length() == 0
+    standby._producer.produce.assert_not_called()
+
+
+def test_solver_expires_after_failover(create_orchestrator, redis_pool):
+    leader = create_orchestrator("replica-1")
+    assert leader._hold_leadership()
+    on_assign = leader._consumer.subscribe.call_args.kwargs["on_assign"]
+    on_assign(leader._consumer, [])
+
+    leader._handle_solver_heartbeat(
+        {"solverId": 1, "slots": [{"solverId": 1, "problemId": "p1"}], "models": []}
+    )
+
+    # The solver stops sending heartbeats - Its problem is requested again
+    expire_leases(redis_pool)
+    leader._expire_solvers()
+
+    assert leader._solver_manager.get_status("1") is None
+    assert leader._solver_registry.get_solvers() == {}
+    topic = leader._producer.produce.call_args.args[0]
+    assert topic == "problem-execute-resend"
+
+
+def test_paused_leader_stops_writing(create_orchestrator, redis_pool):
+    leader = create_orchestrator("replica-1")
+    standby = create_orchestrator("replica-2")
+    assert leader._hold_leadership()
+    consumer = leader._consumer
+    leader._on_assign(consumer, [])
+    leader._handle_solver_heartbeat(
+        {
+            "solverId": 1,
+            "slots": [{"solverId": 1, "problemId": None}],
+            "models": ["vrp"],
+        }
+    )
+    leader._problems_buffer.enqueue(json.dumps({"problemId": "p1", "modelId": "vrp"}))
+
+    # The leader is paused for longer than the lease time - The standby takes over
+    redis.Redis(connection_pool=redis_pool).delete("orchestrator_leader")
+    assert standby._hold_leadership()
+
+    # Problems are not assigned by the paused leader
+    assert leader._dispatcher.dispatch() is None
+    assert standby._dispatcher.dispatch()[0] == "1"
+
+    # The failed renewal stops the consumer, without committing the unhandled messages
+    leader._last_lease_renewal -= timedelta(seconds=leader._leader_lease_time)
+    assert not leader._hold_leadership()
+    consumer.commit.assert_not_called()
+    consumer.close.assert_called_once()
+
+
+def test_standby_does_not_write_state(create_orchestrator, redis_pool):
+    leader = create_orchestrator("replica-1")
+    assert leader._hold_leadership()
+    client = redis.Redis(connection_pool=redis_pool)
+    client.sadd("idle_solvers", "1")
+
+    # Replicas starting as standbys don't rebuild the state of the leader
+    create_orchestrator("replica-2")
+    assert client.smembers("idle_solvers") == {"1"}
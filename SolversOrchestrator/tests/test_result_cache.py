@@ -0,0 +1,28 @@
+import redis
+
+from ResultCache import ResultCache
+
+
+def test_hit_refreshes_ttl_and_lru(redis_pool):
+    cache = ResultCache("cache", None, None, ttl=100, connection_pool=redis_pool)
+    client = redis.Redis(connection_pool=redis_pool)
+
+    cache.put("hash", 1.5, '{"objective": 1}')
+    client.expire("cache:entry:hash", 10)
+    client.zadd("cache:lru", {"hash": 0})
+
+    assert cache.get("hash") == {"executionTime": 1.5, "result": '{"objective": 1}'}
+    assert client.ttl("cache:entry:hash") == 100
+    assert client.zscore("cache:lru", "hash") > 0
+    assert cache.get_stats() == {"hits": 1, "misses": 0, "entries": 1}
+
+
+def test_miss_removes_expired_entry_from_lru(redis_pool):
+    cache = ResultCache("cache", None, None, ttl=100, connection_pool=redis_pool)
+    client = redis.Redis(connection_pool=redis_pool)
+
+    cache.put("hash", 1.5, '{"objective": 1}')
+    client.delete("cache:entry:hash")
+
+    assert cache.get("hash") is None
+    assert cache.get_stats() == {"hits": 0, "misses": 1, "entries": 0}